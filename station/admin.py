@@ -9,6 +9,8 @@ from .models import (
     Trip,
     Order,
     Ticket,
+    Schedule,
+    SeatHold,
 )
 
 admin.site.register(TrainType)
@@ -19,3 +21,5 @@ admin.site.register(Crew)
 admin.site.register(Trip)
 admin.site.register(Order)
 admin.site.register(Ticket)
+admin.site.register(Schedule)
+admin.site.register(SeatHold)
@@ -0,0 +1,193 @@
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from functools import partial
+
+from django.db import transaction
+
+from station.seat_map import SeatMap
+from station.shared_cache import shared_cache
+
+FREE_SEATS_TIMEOUT = 10 * 60
+
+
+class FreeSeatIndex:
+    """Free seats of a trip grouped into runs of adjacent seats.
+
+    ``runs`` maps a run length to a heap of ``(cargo, first seat)``, and
+    ``lengths`` keeps the lengths that have runs in sorted order. A group
+    takes the front of the shortest run it fits in, and the rest of that
+    run goes back as a shorter one. ``starts`` keeps the first seat of
+    every run per cargo, so a single seat can be taken out of its run.
+
+    Allocating and taking cost O(seats + runs in a cargo). Building the
+    index scans all cargo_num * places_in_cargo seats and loads every
+    ticket and hold of the trip, which only happens when no index is
+    cached for the trip's current version: after writes that do not go
+    through the index (cancellations, released or reaped holds, admin
+    edits) or after the cached one expires.
+    """
+
+    def __init__(self, seat_map):
+        self.runs = {}
+        self.lengths = []
+        self.counts = {}
+        self.live = {}
+        self.starts = {}
+        self.free = 0
+        places = seat_map.places_in_cargo
+        for cargo in range(1, seat_map.cargo_num + 1):
+            self.starts[cargo] = []
+            start = None
+            for seat in range(1, places + 2):
+                if seat <= places and not seat_map.is_taken(cargo, seat):
+                    if start is None:
+                        start = seat
+                elif start is not None:
+                    self._add(cargo, start, seat - start)
+                    start = None
+
+    @classmethod
+    def for_trip(cls, trip):
+        return cls(SeatMap.for_trip(trip))
+
+    def _add(self, cargo, start, length):
+        self.live[cargo, start] = length
+        insort(self.starts[cargo], start)
+        self.counts[length] = self.counts.get(length, 0) + 1
+        if self.counts[length] == 1:
+            insort(self.lengths, length)
+        heapq.heappush(self.runs.setdefault(length, []), (cargo, start))
+        self.free += length
+
+    def _remove(self, cargo, start):
+        # Heap entries of removed runs are skipped when they come up.
+        length = self.live.pop((cargo, start))
+        starts = self.starts[cargo]
+        del starts[bisect_left(starts, start)]
+        self.counts[length] -= 1
+        if not self.counts[length]:
+            del self.counts[length]
+            del self.runs[length]
+            del self.lengths[bisect_left(self.lengths, length)]
+        self.free -= length
+
+        return length
+
+    def _take(self, length, count):
+        heap = self.runs[length]
+        cargo, start = heapq.heappop(heap)
+        while self.live.get((cargo, start)) != length:
+            cargo, start = heapq.heappop(heap)
+        self._remove(cargo, start)
+        if length > count:
+            self._add(cargo, start + count, length - count)
+
+        return [(cargo, seat) for seat in range(start, start + count)]
+
+    def allocate(self, count):
+        """Take count free seats, all adjacent in one cargo if any run is
+        long enough, otherwise from the longest runs. Return None when
+        fewer than count seats are free."""
+        if count > self.free:
+            return None
+
+        position = bisect_left(self.lengths, count)
+        if position < len(self.lengths):
+            return self._take(self.lengths[position], count)
+
+        seats = []
+        while len(seats) < count:
+            length = self.lengths[-1]
+            seats += self._take(length, min(length, count - len(seats)))
+
+        return seats
+
+    def take(self, cargo, seat):
+        """Mark a seat as taken. Seats that are not free are ignored."""
+        starts = self.starts[cargo]
+        position = bisect_right(starts, seat) - 1
+        if position < 0:
+            return
+
+        start = starts[position]
+        length = self.live[cargo, start]
+        if seat >= start + length:
+            return
+
+        self._remove(cargo, start)
+        if seat > start:
+            self._add(cargo, start, seat - start)
+        if seat < start + length - 1:
+            self._add(cargo, seat + 1, start + length - 1 - seat)
+
+
+def index_key(trip_id, version):
+    return f"free-seats:{trip_id}:{version}"
+
+
+def free_seat_index(trip, version):
+    """Return the free-seat index of trip as of version, building it from
+    the trip's tickets and holds if it is not cached."""
+    index = shared_cache().get(index_key(trip.id, version))
+    if index is None:
+        index = FreeSeatIndex.for_trip(trip)
+
+    return index
+
+
+def remember_free_seats(trip_id, version, index):
+    shared_cache().set(
+        index_key(trip_id, version), index, FREE_SEATS_TIMEOUT
+    )
+
+
+class LockedFreeSeats:
+    """Free-seat indexes of the trips locked by one transaction.
+
+    versions maps every locked trip to its version when it was locked.
+    Indexes are loaded on first use and cached on commit under the
+    version the transaction leaves behind, which is one higher.
+    """
+
+    def __init__(self, versions):
+        self.versions = versions
+        self.indexes = {}
+        self.changed = set()
+
+    def index(self, trip):
+        index = self.indexes.get(trip.id)
+        if index is None:
+            if trip.id in self.changed:
+                index = FreeSeatIndex.for_trip(trip)
+            else:
+                index = free_seat_index(trip, self.versions[trip.id])
+            self.indexes[trip.id] = index
+
+        return index
+
+    def allocate(self, trip, count):
+        return self.index(trip).allocate(count)
+
+    def take(self, seats_data):
+        """Take seats picked by the customer out of the indexes, so the
+        index cached on commit stays current without a rebuild."""
+        for seat_data in seats_data:
+            self.index(seat_data["trip"]).take(
+                seat_data["cargo"], seat_data["seat"]
+            )
+
+    def forget(self, trip_ids):
+        """Drop the indexes of trips whose seats changed in this
+        transaction without going through them."""
+        for trip_id in trip_ids:
+            self.indexes.pop(trip_id, None)
+            self.changed.add(trip_id)
+
+    def remember_on_commit(self):
+        for trip_id, index in self.indexes.items():
+            transaction.on_commit(partial(
+                remember_free_seats,
+                trip_id,
+                self.versions[trip_id] + 1,
+                index,
+            ))
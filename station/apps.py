@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class StationConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "station"
+
+    def ready(self):
+        import station.checks  # noqa: F401
+        import station.signals  # noqa: F401
@@ -0,0 +1,150 @@
+"""Async read-only endpoints for trip search, served natively by ASGI.
+
+Responses have the same shape as the matching DRF viewset actions, and
+the trip detail honours ?seats= and If-None-Match like the sync one.
+Authentication and throttling reuse the DRF settings and run in one
+worker-thread hop before the ORM is queried.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotModified, JsonResponse
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from station.filters import filter_trips
+from station.models import Station, Trip
+from station.replicas import use_replica, pinned_to_primary
+from station.response_cache import etag_matches
+from station.serializers import (
+    StationSerializer,
+    TripListSerializer,
+    TripDetailSerializer,
+    TripSeatMapSerializer,
+)
+from station.views import TripViewSet, TripPagination
+
+
+def authorize(request):
+    """Authenticate and throttle the request like a DRF view would."""
+    drf_request = Request(
+        request,
+        authenticators=[
+            authenticator()
+            for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ],
+    )
+    if not (drf_request.user and drf_request.user.is_authenticated):
+        raise exceptions.NotAuthenticated()
+
+    view = APIView()
+    for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+        throttle = throttle_class()
+        if not throttle.allow_request(drf_request, view):
+            raise exceptions.Throttled(throttle.wait())
+
+    return drf_request
+
+
+def error_response(exc):
+    data = exc.detail
+    if not isinstance(data, (dict, list)):
+        data = {"detail": data}
+
+    response = JsonResponse(data, status=exc.status_code, safe=False)
+    if isinstance(exc, exceptions.NotAuthenticated):
+        response["WWW-Authenticate"] = 'Bearer realm="api"'
+    if isinstance(exc, exceptions.Throttled) and exc.wait:
+        response["Retry-After"] = str(int(exc.wait))
+
+    return response
+
+
+def async_api_view(handler):
+    """Run handler for authorized GET requests, rendering API errors."""
+
+    @wraps(handler)
+    async def view(request, *args, **kwargs):
+        if request.method != "GET":
+            return error_response(exceptions.MethodNotAllowed(request.method))
+
+        try:
+            drf_request = await sync_to_async(authorize)(request)
+        except exceptions.APIException as exc:
+            return error_response(exc)
+
+        pinned = await sync_to_async(pinned_to_primary)(drf_request.user)
+        token = use_replica.set(not pinned)
+        try:
+            return await handler(drf_request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return error_response(exc)
+        finally:
+            use_replica.reset(token)
+
+    return view
+
+
+@async_api_view
+async def station_list(request):
+    stations = [
+        station async for station in Station.objects.all().aiterator()
+    ]
+
+    return JsonResponse(
+        StationSerializer(stations, many=True).data, safe=False
+    )
+
+
+@async_api_view
+async def trip_list(request):
+    queryset = await sync_to_async(filter_trips)(
+        TripViewSet.queryset.all(), request.query_params
+    )
+    paginator = TripPagination()
+    if paginator.page_number_class.page_query_param in request.query_params:
+        # Django's Paginator has no async API.
+        trips = await sync_to_async(paginator.paginate_queryset)(
+            queryset, request
+        )
+    else:
+        trips = paginator.paginate_results([
+            trip
+            async for trip in paginator.page_queryset(queryset, request)
+        ])
+
+    return JsonResponse(paginator.get_paginated_response(
+        TripListSerializer(trips, many=True).data
+    ).data)
+
+
+@async_api_view
+async def trip_detail(request, pk):
+    encoding = TripViewSet.seat_map_encoding(request.query_params)
+    etag = await sync_to_async(TripViewSet.detail_etag)(pk, encoding, "json")
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+
+        return response
+
+    queryset = TripViewSet.queryset.select_related(
+        "train__train_type"
+    ).prefetch_related("crews")
+    try:
+        trip = await queryset.aget(pk=pk)
+    except Trip.DoesNotExist:
+        raise exceptions.NotFound()
+    await trip.aload_taken_seats()
+
+    serializer_class = TripDetailSerializer
+    if encoding != "list":
+        serializer_class = TripSeatMapSerializer
+    response = JsonResponse(serializer_class(
+        trip, context={"seat_map_encoding": encoding}
+    ).data)
+    response["ETag"] = etag
+
+    return response
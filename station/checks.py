@@ -0,0 +1,27 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Warning, register
+
+from station.shared_cache import SHARED_CACHE_ALIAS
+
+
+def cache_is_shared(alias=SHARED_CACHE_ALIAS):
+    """Return whether every process sees what the cache alias stores."""
+    return not isinstance(caches[alias], LocMemCache)
+
+
+@register("caches", deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if cache_is_shared():
+        return []
+
+    return [
+        Warning(
+            "The shared cache is local to each process.",
+            hint=(
+                "Generation tokens, replica pins and free-seat indexes are "
+                "not shared between workers. Set REDIS_URL."
+            ),
+            id="station.W001",
+        )
+    ]
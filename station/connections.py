@@ -0,0 +1,129 @@
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from station.indexes import ModelIndex
+from station.models import Trip
+
+SNAPSHOT_DAYS = 3
+MAX_SNAPSHOTS = 7
+
+
+class Timetable:
+    """Trips departing within a window as departure-sorted arrays.
+
+    Times are stored as seconds since the start of the window.
+    """
+
+    def __init__(self, start, days=SNAPSHOT_DAYS):
+        self.start = start
+        self.end = start + timedelta(days=days)
+        self.trips = array("q")
+        self.sources = array("q")
+        self.destinations = array("q")
+        self.departures = array("q")
+        self.arrivals = array("q")
+
+    def seconds(self, moment):
+        return int((moment - self.start).total_seconds())
+
+    def load(self, trips):
+        for trip_id, source, destination, departure, arrival in trips:
+            self.trips.append(trip_id)
+            self.sources.append(source)
+            self.destinations.append(destination)
+            self.departures.append(self.seconds(departure))
+            self.arrivals.append(self.seconds(arrival))
+
+        return self
+
+    def earliest_arrival(self, source, destination, departure, transfer):
+        """Scan once from departure and return trip ids of the itinerary
+        reaching destination earliest, or None if it is unreachable.
+
+        transfer is the minimum time between arriving at an intermediate
+        station and leaving it.
+        """
+        transfer = int(transfer.total_seconds())
+        earliest = {source: self.seconds(departure)}
+        reached_by = {}
+        unreachable = self.seconds(self.end) + 1
+
+        first = bisect_left(self.departures, earliest[source])
+        for index in range(first, len(self.departures)):
+            departs = self.departures[index]
+            if departs >= earliest.get(destination, unreachable):
+                break
+
+            station = self.sources[index]
+            if station not in earliest:
+                continue
+            ready = earliest[station] + (0 if station == source else transfer)
+            if departs < ready:
+                continue
+
+            next_station = self.destinations[index]
+            if self.arrivals[index] < earliest.get(next_station, unreachable):
+                earliest[next_station] = self.arrivals[index]
+                reached_by[next_station] = index
+
+        if destination not in reached_by:
+            return None
+
+        legs = []
+        station = destination
+        while station != source:
+            index = reached_by[station]
+            legs.append(self.trips[index])
+            station = self.sources[index]
+
+        return legs[::-1]
+
+
+class TimetableIndex(ModelIndex):
+    """Timetable snapshots by day, dropped whenever trips change."""
+
+    cache_key = "station:index:timetable"
+
+    def build(self):
+        return OrderedDict()
+
+    def snapshot(self, day):
+        snapshots = self.get()
+        timetable = snapshots.get(day)
+        if timetable is None:
+            with self._lock:
+                timetable = snapshots.get(day)
+                if timetable is None:
+                    timetable = self.load(day)
+                    snapshots[day] = timetable
+                    while len(snapshots) > MAX_SNAPSHOTS:
+                        snapshots.popitem(last=False)
+
+        return timetable
+
+    @staticmethod
+    def load(day):
+        timetable = Timetable(datetime.combine(day, datetime.min.time()))
+        trips = Trip.objects.filter(
+            departure_time__gte=timetable.start,
+            departure_time__lt=timetable.end,
+        ).order_by("departure_time").values_list(
+            "id",
+            "route__source_id",
+            "route__destination_id",
+            "departure_time",
+            "arrival_time",
+        )
+
+        return timetable.load(trips.iterator(chunk_size=5000))
+
+    def earliest_arrival(self, source, destination, departure, transfer):
+        timetable = self.snapshot(departure.date())
+        return timetable.earliest_arrival(
+            source, destination, departure, transfer
+        )
+
+
+timetable = TimetableIndex()
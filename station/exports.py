@@ -0,0 +1,62 @@
+import csv
+import json
+
+from station.models import Ticket
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_COLUMNS = (
+    ("order_id", "order_id"),
+    ("created_at", "order__created_at"),
+    ("user", "order__user__email"),
+    ("ticket_id", "id"),
+    ("trip_id", "trip_id"),
+    ("departure_time", "trip__departure_time"),
+    ("arrival_time", "trip__arrival_time"),
+    ("source", "trip__route__source__name"),
+    ("destination", "trip__route__destination__name"),
+    ("train", "trip__train__name"),
+    ("cargo", "cargo"),
+    ("seat", "seat"),
+)
+
+
+class Echo:
+    """File-like object whose write returns the data instead of storing
+    it, so csv.writer can produce lines one at a time."""
+
+    def write(self, value):
+        return value
+
+
+def ticket_rows(chunk_size=EXPORT_CHUNK_SIZE):
+    """Iterate over every ticket joined with its order, trip, route and
+    train, fetched in chunks through a server-side cursor."""
+    return Ticket.objects.order_by("order_id", "id").values_list(
+        *(lookup for _, lookup in EXPORT_COLUMNS)
+    ).iterator(chunk_size=chunk_size)
+
+
+def export_value(value):
+    """Dates and times in ISO 8601, the same in every format."""
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def render_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(name for name, _ in EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(export_value(value) for value in row)
+
+
+def render_ndjson(rows):
+    names = [name for name, _ in EXPORT_COLUMNS]
+    for row in rows:
+        yield json.dumps(
+            {name: export_value(value) for name, value in zip(names, row)}
+        ) + "\n"
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", render_csv),
+    "ndjson": ("application/x-ndjson", render_ndjson),
+}
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+from rest_framework.exceptions import ValidationError
+
+from station.search import station_names
+
+
+def get_datetime_param(query_params, name, date_format=None):
+    value = query_params.get(name)
+    if not value:
+        return None
+
+    try:
+        if date_format:
+            parsed = datetime.strptime(value, date_format)
+        else:
+            parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({name: f"Invalid date: {value}"})
+
+    # Times are stored naive (USE_TZ is off) and cannot be compared with
+    # an offset-aware value such as 2022-06-02T08:00Z.
+    if parsed.tzinfo is not None:
+        raise ValidationError(
+            {name: f"Time zone offsets are not supported: {value}"}
+        )
+
+    return parsed
+
+
+def filter_trips(queryset, query_params):
+    """Apply the trip search query parameters to a Trip queryset."""
+    source = query_params.get("source")
+    destination = query_params.get("destination")
+    departure_time = get_datetime_param(
+        query_params, "departure_time", "%Y-%m-%d"
+    )
+    arrival_time = get_datetime_param(
+        query_params, "arrival_time", "%Y-%m-%d"
+    )
+    departure_after = get_datetime_param(query_params, "departure_after")
+    departure_before = get_datetime_param(query_params, "departure_before")
+
+    # Dates are matched as half-open datetime ranges rather than with
+    # __date, which would cast the column and bypass its index.
+    if departure_time:
+        queryset = queryset.filter(
+            departure_time__gte=departure_time,
+            departure_time__lt=departure_time + timedelta(days=1),
+        )
+
+    if arrival_time:
+        queryset = queryset.filter(
+            arrival_time__gte=arrival_time,
+            arrival_time__lt=arrival_time + timedelta(days=1),
+        )
+
+    if departure_after:
+        queryset = queryset.filter(departure_time__gte=departure_after)
+
+    if departure_before:
+        queryset = queryset.filter(departure_time__lt=departure_before)
+
+    # Station names are resolved in memory, so the trip query filters
+    # on indexed foreign keys instead of ILIKE over joined stations.
+    if source:
+        queryset = queryset.filter(
+            route__source_id__in=station_names.search(source)
+        )
+
+    if destination:
+        queryset = queryset.filter(
+            route__destination_id__in=station_names.search(destination)
+        )
+
+    return queryset
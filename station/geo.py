@@ -0,0 +1,121 @@
+import heapq
+from collections import defaultdict
+from math import asin, cos, floor, radians, sin, sqrt
+
+from station.indexes import ModelIndex
+from station.models import Station
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.195
+CELL_DEGREES = 0.5
+LONGITUDE_CELLS = int(360 / CELL_DEGREES)
+
+
+def haversine(latitude1, longitude1, latitude2, longitude2):
+    """Great-circle distance between two points in kilometres."""
+    latitude1, longitude1, latitude2, longitude2 = map(
+        radians, (latitude1, longitude1, latitude2, longitude2)
+    )
+    hav = (
+        sin((latitude2 - latitude1) / 2) ** 2
+        + cos(latitude1) * cos(latitude2)
+        * sin((longitude2 - longitude1) / 2) ** 2
+    )
+
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(hav))
+
+
+def cell(latitude, longitude):
+    return (
+        floor(latitude / CELL_DEGREES),
+        floor(longitude / CELL_DEGREES) % LONGITUDE_CELLS,
+    )
+
+
+class GridCell:
+    """Stations of one grid cell with coordinates kept in radians."""
+
+    def __init__(self):
+        self.ids = []
+        self.latitudes = []
+        self.longitudes = []
+        self.cosines = []
+
+    def add(self, station_id, latitude, longitude):
+        self.ids.append(station_id)
+        self.latitudes.append(radians(latitude))
+        self.longitudes.append(radians(longitude))
+        self.cosines.append(cos(radians(latitude)))
+
+    def distances(self, latitude, longitude, cosine):
+        """Haversine distances from a point (in radians) to every station
+        of the cell, computed in one pass over the cell's arrays."""
+        return [
+            2 * EARTH_RADIUS_KM * asin(sqrt(min(1.0, (
+                sin((other_latitude - latitude) / 2) ** 2
+                + cosine * other_cosine
+                * sin((other_longitude - longitude) / 2) ** 2
+            ))))
+            for other_latitude, other_longitude, other_cosine in zip(
+                self.latitudes, self.longitudes, self.cosines
+            )
+        ]
+
+
+class StationGridIndex(ModelIndex):
+    """Stations bucketed into a fixed latitude/longitude grid."""
+
+    cache_key = "station:index:grid"
+
+    def build(self):
+        grid = defaultdict(GridCell)
+        for station_id, latitude, longitude in Station.objects.filter(
+            latitude__isnull=False, longitude__isnull=False
+        ).values_list("id", "latitude", "longitude"):
+            grid[cell(latitude, longitude)].add(
+                station_id, latitude, longitude
+            )
+
+        return dict(grid)
+
+    def nearest(self, latitude, longitude, radius, limit):
+        """Return up to limit (distance, station id) within radius km,
+        nearest first."""
+        grid = self.get()
+        latitude_span = radius / KM_PER_DEGREE
+        longitude_span = min(
+            180.0,
+            radius / (KM_PER_DEGREE * max(cos(radians(latitude)), 1e-6))
+        )
+        if abs(latitude) + latitude_span >= 90:
+            longitude_span = 180.0
+
+        south, west = cell(
+            latitude - latitude_span, longitude - longitude_span
+        )
+        north, east = cell(
+            latitude + latitude_span, longitude + longitude_span
+        )
+        longitude_cells = (east - west) % LONGITUDE_CELLS + 1
+        if longitude_span >= 180.0:
+            west, longitude_cells = 0, LONGITUDE_CELLS
+
+        point = radians(latitude), radians(longitude), cos(radians(latitude))
+        found = []
+        for row in range(south, north + 1):
+            for column in range(longitude_cells):
+                bucket = grid.get((row, (west + column) % LONGITUDE_CELLS))
+                if bucket is None:
+                    continue
+                found.extend(
+                    (distance, station_id)
+                    for distance, station_id in zip(
+                        bucket.distances(*point), bucket.ids
+                    )
+                    if distance <= radius
+                )
+
+        return heapq.nsmallest(limit, found)
+
+
+station_grid = StationGridIndex()
@@ -0,0 +1,88 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from station.exceptions import IdempotencyKeyReused
+from station.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+KEY_MAX_LENGTH = IdempotencyKey._meta.get_field("key").max_length
+
+
+def fingerprint(data):
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode()
+    ).hexdigest()
+
+
+def lock_key(user, key, request_fingerprint):
+    """Return the locked record of the user's key, creating it if needed.
+
+    A duplicate of a request still in flight blocks here on the unique
+    constraint until that request commits its response.
+    """
+    now = datetime.now()
+    expires_at = now + timedelta(seconds=settings.IDEMPOTENCY_KEY_SECONDS)
+    record, created = IdempotencyKey.objects.select_for_update(
+    ).get_or_create(
+        user=user,
+        key=key,
+        defaults={
+            "fingerprint": request_fingerprint,
+            "expires_at": expires_at,
+        },
+    )
+    if not created and record.expires_at <= now:
+        record.fingerprint = request_fingerprint
+        record.status_code = record.response = None
+        record.expires_at = expires_at
+
+    return record
+
+
+class IdempotentCreateMixin:
+    """Replay the stored response to a create retried with the same
+    Idempotency-Key header instead of running it again.
+
+    The key record is written in the same transaction as the created
+    objects. A request that fails with a server error stores nothing, so
+    its retry runs again.
+    """
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return super().create(request, *args, **kwargs)
+        if not key or len(key) > KEY_MAX_LENGTH:
+            raise ValidationError({IDEMPOTENCY_HEADER: (
+                f"Must be 1 to {KEY_MAX_LENGTH} characters long."
+            )})
+
+        request_fingerprint = fingerprint(request.data)
+        with transaction.atomic():
+            record = lock_key(request.user, key, request_fingerprint)
+            if record.status_code is not None:
+                if record.fingerprint != request_fingerprint:
+                    raise IdempotencyKeyReused()
+
+                return Response(
+                    record.response,
+                    status=record.status_code,
+                    headers={"Idempotent-Replayed": "true"},
+                )
+
+            try:
+                response = super().create(request, *args, **kwargs)
+            except APIException as exc:
+                response = self.handle_exception(exc)
+            record.status_code = response.status_code
+            record.response = response.data
+            record.save()
+
+        return response
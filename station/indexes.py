@@ -0,0 +1,51 @@
+import threading
+
+from django.db import transaction
+
+from station.replicas import primary
+from station.shared_cache import bump_generation, get_generations
+
+
+class ModelIndex:
+    """Process-local lookup structure built lazily from the database.
+
+    Each index keeps a generation token in the shared cache. ``invalidate``
+    replaces the token, and every process rebuilds its copy on the next
+    lookup after noticing the change.
+    """
+
+    cache_key = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = (None, None)
+
+    def build(self):
+        raise NotImplementedError
+
+    def generation(self):
+        return get_generations([self.cache_key])[0]
+
+    def get(self):
+        generation = self.generation()
+        built_for, data = self._state
+        if built_for != generation:
+            with self._lock:
+                built_for, data = self._state
+                if built_for != generation:
+                    # A lagging replica would leave the rebuilt copy
+                    # stale until the next invalidation.
+                    with primary():
+                        data = self.build()
+                    self._state = (generation, data)
+
+        return data
+
+    def _bump(self):
+        bump_generation(self.cache_key)
+
+    def invalidate(self):
+        # Bump again on commit, in case another process rebuilt from the
+        # data that was visible before this transaction committed.
+        self._bump()
+        transaction.on_commit(self._bump)
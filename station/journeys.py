@@ -0,0 +1,131 @@
+import heapq
+from collections import defaultdict, namedtuple
+
+from station.geo import haversine
+from station.indexes import ModelIndex
+from station.models import Route
+
+Journey = namedtuple("Journey", ["distance", "stations", "routes"])
+
+
+class RouteGraph:
+    """Adjacency list of routes with shortest-path search by distance.
+
+    The A* heuristic is the great-circle distance to the target scaled by
+    the smallest ratio of route distance to great-circle distance seen so
+    far. That keeps it consistent even when a route is recorded shorter
+    than the straight line between its stations. A route touching a
+    station without coordinates could be arbitrarily short, so it turns
+    the heuristic off and the search becomes plain Dijkstra.
+    """
+
+    def __init__(self):
+        self.edges = defaultdict(list)
+        self.names = {}
+        self.coordinates = {}
+        self.heuristic_scale = 1.0
+        self.route_count = 0
+
+    def add_station(self, station_id, name, latitude, longitude):
+        self.names[station_id] = name
+        if latitude is not None and longitude is not None:
+            self.coordinates[station_id] = (latitude, longitude)
+
+    def add_route(self, route_id, source_id, destination_id, distance):
+        self.edges[source_id].append((destination_id, distance, route_id))
+        self.route_count += 1
+
+        if (
+            source_id not in self.coordinates
+            or destination_id not in self.coordinates
+        ):
+            self.heuristic_scale = 0
+            return
+
+        straight = self.straight_distance(source_id, destination_id)
+        if straight:
+            self.heuristic_scale = min(
+                self.heuristic_scale, distance / straight
+            )
+
+    def straight_distance(self, source_id, destination_id):
+        if (
+            source_id not in self.coordinates
+            or destination_id not in self.coordinates
+        ):
+            return 0
+
+        return haversine(
+            *self.coordinates[source_id], *self.coordinates[destination_id]
+        )
+
+    def shortest_path(self, source_id, destination_id, use_heuristic=True):
+        """Return the shortest Journey or None if there is no path."""
+        scale = max(self.heuristic_scale, 0) if use_heuristic else 0
+        distances = {source_id: 0}
+        previous = {}
+        queue = [(0, 0, source_id)]
+
+        while queue:
+            _, distance, station_id = heapq.heappop(queue)
+            if station_id == destination_id:
+                return self._journey(
+                    source_id, destination_id, distance, previous
+                )
+            if distance > distances[station_id]:
+                continue
+
+            for next_id, length, route_id in self.edges.get(station_id, ()):
+                next_distance = distance + length
+                if next_distance < distances.get(next_id, next_distance + 1):
+                    distances[next_id] = next_distance
+                    previous[next_id] = (station_id, route_id)
+                    estimate = next_distance + scale * self.straight_distance(
+                        next_id, destination_id
+                    )
+                    heapq.heappush(queue, (estimate, next_distance, next_id))
+
+        return None
+
+    @staticmethod
+    def _journey(source_id, destination_id, distance, previous):
+        stations = [destination_id]
+        routes = []
+        while stations[-1] != source_id:
+            station_id, route_id = previous[stations[-1]]
+            stations.append(station_id)
+            routes.append(route_id)
+
+        return Journey(distance, stations[::-1], routes[::-1])
+
+
+class RouteGraphIndex(ModelIndex):
+    """Route graph rebuilt whenever a route or routed station changes."""
+
+    cache_key = "station:index:routes"
+
+    def build(self):
+        graph = RouteGraph()
+        for route in Route.objects.values_list(
+            "id",
+            "distance",
+            "source_id",
+            "source__name",
+            "source__latitude",
+            "source__longitude",
+            "destination_id",
+            "destination__name",
+            "destination__latitude",
+            "destination__longitude",
+        ).order_by("id"):
+            route_id, distance, source, destination = (
+                route[0], route[1], route[2:6], route[6:]
+            )
+            graph.add_station(*source)
+            graph.add_station(*destination)
+            graph.add_route(route_id, source[0], destination[0], distance)
+
+        return graph
+
+
+route_graph = RouteGraphIndex()
@@ -0,0 +1,106 @@
+import random
+import time
+
+from django.core.management import BaseCommand
+
+from station.journeys import RouteGraph
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the journey planner on a synthetic
+    network. Nothing is read from or written to the database."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stations", type=int, default=30000)
+        parser.add_argument(
+            "--neighbours",
+            type=int,
+            default=3,
+            help="Routes leaving every station towards its nearest ones.",
+        )
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        rng = random.Random(options["seed"])
+
+        started = time.perf_counter()
+        graph = self.build_graph(
+            rng, options["stations"], options["neighbours"]
+        )
+        self.stdout.write(
+            f"Built {options['stations']} stations, "
+            f"{graph.route_count} routes in "
+            f"{time.perf_counter() - started:.2f}s"
+        )
+
+        pairs = [
+            (
+                rng.randrange(options["stations"]),
+                rng.randrange(options["stations"])
+            )
+            for _ in range(options["queries"])
+        ]
+        results = {}
+        for label, use_heuristic in (("Dijkstra", False), ("A*", True)):
+            started = time.perf_counter()
+            results[label] = [
+                graph.shortest_path(source, destination, use_heuristic)
+                for source, destination in pairs
+            ]
+            elapsed = time.perf_counter() - started
+            found = sum(journey is not None for journey in results[label])
+            self.stdout.write(
+                f"{label}: {found}/{len(pairs)} journeys found, "
+                f"{elapsed / len(pairs) * 1000:.2f} ms per query"
+            )
+
+        mismatches = sum(
+            (exact and exact.distance) != (estimated and estimated.distance)
+            for exact, estimated in zip(results["Dijkstra"], results["A*"])
+        )
+        if mismatches:
+            self.stdout.write(
+                self.style.ERROR(f"{mismatches} A* distance mismatch(es)")
+            )
+
+    @staticmethod
+    def build_graph(rng, stations, neighbours):
+        """Scatter stations over a 10x20 degree box and link every station
+        both ways with its nearest neighbours in a coarse grid."""
+        graph = RouteGraph()
+        cells = {}
+        for station_id in range(stations):
+            latitude = 44 + rng.random() * 10
+            longitude = 22 + rng.random() * 20
+            graph.add_station(station_id, str(station_id), latitude, longitude)
+            cells.setdefault(
+                (int(latitude * 4), int(longitude * 4)), []
+            ).append(station_id)
+
+        route_id = 0
+        for station_id, (latitude, longitude) in graph.coordinates.items():
+            cell_lat, cell_lon = int(latitude * 4), int(longitude * 4)
+            candidates = [
+                other
+                for lat in range(cell_lat - 1, cell_lat + 2)
+                for lon in range(cell_lon - 1, cell_lon + 2)
+                for other in cells.get((lat, lon), ())
+                if other != station_id
+            ]
+            candidates.sort(
+                key=lambda other: graph.straight_distance(station_id, other)
+            )
+            for other in candidates[:neighbours]:
+                distance = round(
+                    graph.straight_distance(station_id, other)
+                    * rng.uniform(1.05, 1.4)
+                ) + 1
+                for source, destination in (
+                    (station_id, other), (other, station_id)
+                ):
+                    route_id += 1
+                    graph.add_route(route_id, source, destination, distance)
+
+        return graph
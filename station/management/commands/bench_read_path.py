@@ -0,0 +1,113 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """Django command to compare trip search throughput of a WSGI server
+    running the DRF viewsets with an ASGI server running the async views
+    under many slow concurrent clients.
+
+    Both servers must already be running, e.g. ``gunicorn
+    train_station.wsgi`` and ``uvicorn train_station.asgi:application``,
+    with THROTTLE_USER_RATE raised high enough for the run."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sync-url",
+            default="http://127.0.0.1:8000/api/station/trips/",
+        )
+        parser.add_argument(
+            "--async-url",
+            default="http://127.0.0.1:8001/api/station/async/trips/",
+        )
+        parser.add_argument("--token", required=True)
+        parser.add_argument("--clients", type=int, default=200)
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=10,
+            help="Requests sent one after another by every client.",
+        )
+        parser.add_argument(
+            "--slow",
+            type=float,
+            default=0.2,
+            help="Seconds every client stalls between request headers.",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        for label, url in (
+            ("sync WSGI", options["sync_url"]),
+            ("async ASGI", options["async_url"]),
+        ):
+            elapsed, latencies, failed = asyncio.run(self.run(
+                url,
+                options["token"],
+                options["clients"],
+                options["requests"],
+                options["slow"],
+            ))
+            latencies.sort()
+            self.stdout.write(
+                f"{label}: {len(latencies) / elapsed:.1f} req/s, "
+                f"p50 {self.percentile(latencies, 50):.0f} ms, "
+                f"p95 {self.percentile(latencies, 95):.0f} ms, "
+                f"p99 {self.percentile(latencies, 99):.0f} ms, "
+                f"{failed} failed"
+            )
+
+    async def run(self, url, token, clients, requests, slow):
+        parts = urlsplit(url)
+        if parts.scheme != "http" or not parts.hostname:
+            raise CommandError(f"Expected a plain http:// URL, got {url}")
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        head = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\n"
+        ).encode()
+        tail = (
+            f"Authorization: Bearer {token}\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode()
+        latencies = []
+        failures = []
+
+        async def client():
+            for _ in range(requests):
+                started = time.perf_counter()
+                try:
+                    reader, writer = await asyncio.open_connection(
+                        parts.hostname, parts.port or 80
+                    )
+                    writer.write(head)
+                    await writer.drain()
+                    await asyncio.sleep(slow)
+                    writer.write(tail)
+                    await writer.drain()
+                    status_line = await reader.readline()
+                    await reader.read()
+                    writer.close()
+                    await writer.wait_closed()
+                except OSError:
+                    failures.append(None)
+                    continue
+                if status_line.split()[1:2] != [b"200"]:
+                    failures.append(status_line)
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+
+        return time.perf_counter() - started, latencies, len(failures)
+
+    @staticmethod
+    def percentile(values, percent):
+        if len(values) < 2:
+            return values[0] if values else 0
+        return statistics.quantiles(values, n=100)[percent - 1]
@@ -0,0 +1,29 @@
+import sys
+
+from django.core.management import BaseCommand
+
+from station.exports import EXPORT_FORMATS, ticket_rows
+
+
+class Command(BaseCommand):
+    """Django command to stream every ticket with its order, trip, route
+    and train as CSV or NDJSON."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=tuple(EXPORT_FORMATS), default="csv"
+        )
+        parser.add_argument(
+            "--output", help="Output file, stdout by default."
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        _, render = EXPORT_FORMATS[options["format"]]
+        if options["output"]:
+            with open(
+                options["output"], "w", newline="", encoding="utf-8"
+            ) as stream:
+                stream.writelines(render(ticket_rows()))
+        else:
+            sys.stdout.writelines(render(ticket_rows()))
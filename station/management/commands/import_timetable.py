@@ -0,0 +1,196 @@
+import csv
+import json
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+
+from station.checks import cache_is_shared
+from station.connections import timetable
+from station.geo import station_grid
+from station.journeys import route_graph
+from station.models import Station, Route, Train, Trip
+from station.response_cache import invalidate_responses
+from station.search import station_names
+
+
+class RowError(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """Django command to stream stations, routes or trips from CSV or
+    NDJSON into the database in batches.
+
+    Columns: stations - name, latitude, longitude; routes - source,
+    destination, distance; trips - source, destination, train,
+    departure_time, arrival_time. Stations and trains are referenced by
+    name, trips use the route between their source and destination.
+    """
+
+    kinds = ("stations", "routes", "trips")
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=self.kinds)
+        parser.add_argument("path", help="Input file, - for stdin.")
+        parser.add_argument(
+            "--format",
+            choices=("csv", "ndjson"),
+            help="Input format, guessed from the file extension by default.",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--skip-invalid",
+            action="store_true",
+            help="Report and skip invalid rows instead of stopping.",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        kind = options["kind"]
+        input_format = options["format"] or (
+            "ndjson" if options["path"].endswith((".ndjson", ".jsonl"))
+            else "csv"
+        )
+        make_object = getattr(self, f"make_{kind[:-1]}")
+        getattr(self, f"load_{kind}_cache")()
+        if not cache_is_shared():
+            self.stderr.write(self.style.WARNING(
+                "The shared cache is local to this process: running "
+                "servers keep serving their cached indexes and responses "
+                "until they restart."
+            ))
+
+        try:
+            if options["path"] == "-":
+                self.import_file(
+                    sys.stdin, input_format, make_object, options
+                )
+            else:
+                with open(
+                    options["path"], newline="", encoding="utf-8"
+                ) as stream:
+                    self.import_file(
+                        stream, input_format, make_object, options
+                    )
+        finally:
+            # Batches committed before a failure are visible too.
+            self.invalidate(kind)
+
+    @staticmethod
+    def invalidate(kind):
+        if kind == "stations":
+            station_names.invalidate()
+            station_grid.invalidate()
+            invalidate_responses(Station)
+        if kind == "routes":
+            invalidate_responses(Route)
+        route_graph.invalidate()
+        timetable.invalidate()
+
+    def import_file(self, stream, input_format, make_object, options):
+        rows = enumerate(
+            csv.DictReader(stream) if input_format == "csv"
+            else (json.loads(line) for line in stream if line.strip()),
+            start=2 if input_format == "csv" else 1,
+        )
+        model = {
+            "stations": Station, "routes": Route, "trips": Trip
+        }[options["kind"]]
+
+        imported = skipped = 0
+        started = time.perf_counter()
+        while True:
+            batch = []
+            for line, row in islice(rows, options["batch_size"]):
+                try:
+                    batch.append(make_object(row))
+                except (RowError, KeyError, TypeError, ValueError) as error:
+                    if not options["skip_invalid"]:
+                        raise CommandError(f"Line {line}: {error!r}")
+                    self.stderr.write(f"Line {line} skipped: {error!r}")
+                    skipped += 1
+            if not batch:
+                break
+
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            imported += len(batch)
+            self.stdout.write(
+                f"{imported} {options['kind']} imported, "
+                f"{imported / (time.perf_counter() - started):.0f} rows/sec"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} {options['kind']} "
+            f"({skipped} skipped) in {time.perf_counter() - started:.1f}s"
+        ))
+
+    def load_stations_cache(self):
+        pass
+
+    def load_routes_cache(self):
+        self.stations = {}
+        for station_id, name in Station.objects.order_by("-id").values_list(
+            "id", "name"
+        ):
+            self.stations[name] = station_id
+
+    def load_trips_cache(self):
+        self.load_routes_cache()
+        self.trains = {}
+        for train_id, name in Train.objects.order_by("-id").values_list(
+            "id", "name"
+        ):
+            self.trains[name] = train_id
+        self.routes = {}
+        for route_id, source, destination in Route.objects.order_by(
+            "-id"
+        ).values_list("id", "source_id", "destination_id"):
+            self.routes[(source, destination)] = route_id
+
+    @staticmethod
+    def lookup(cache, key, label):
+        try:
+            return cache[key]
+        except KeyError:
+            raise RowError(f"Unknown {label} {key!r}")
+
+    @staticmethod
+    def make_station(row):
+        return Station(
+            name=row["name"],
+            latitude=float(row["latitude"]) if row.get("latitude") else None,
+            longitude=(
+                float(row["longitude"]) if row.get("longitude") else None
+            ),
+        )
+
+    def make_route(self, row):
+        return Route(
+            source_id=self.lookup(self.stations, row["source"], "station"),
+            destination_id=self.lookup(
+                self.stations, row["destination"], "station"
+            ),
+            distance=int(row["distance"]),
+        )
+
+    def make_trip(self, row):
+        route = (
+            self.lookup(self.stations, row["source"], "station"),
+            self.lookup(self.stations, row["destination"], "station"),
+        )
+        departure_time = datetime.fromisoformat(row["departure_time"])
+        arrival_time = datetime.fromisoformat(row["arrival_time"])
+        if arrival_time <= departure_time:
+            raise RowError("Arrival must be after departure")
+
+        return Trip(
+            route_id=self.lookup(self.routes, route, "route"),
+            train_id=self.lookup(self.trains, row["train"], "train"),
+            departure_time=departure_time,
+            arrival_time=arrival_time,
+        )
@@ -0,0 +1,69 @@
+import logging
+import time
+from collections import Counter
+
+from django.core.management import BaseCommand, CommandError
+
+from station.models import QueuedOrder
+from station.order_queue import place_queued_orders
+
+logger = logging.getLogger(__name__)
+
+# Batches in a row that may fail with --drain before the worker gives up.
+MAX_FAILED_BATCHES = 3
+
+
+class Command(BaseCommand):
+    """Django command to place orders queued while QUEUE_ORDERS is on.
+
+    Runs until it is stopped, or until the queue is empty with --drain.
+    Several workers can run side by side. A batch that fails, e.g. on a
+    lock timeout, is logged and claimed again on the next poll."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--idle-sleep",
+            type=float,
+            default=0.5,
+            help="Seconds to wait before polling an empty queue again.",
+        )
+        parser.add_argument(
+            "--drain",
+            action="store_true",
+            help="Stop once the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        totals = Counter()
+        failed_batches = 0
+        try:
+            while True:
+                try:
+                    outcomes = place_queued_orders(options["batch_size"])
+                except Exception:
+                    logger.exception("Could not place queued orders")
+                    failed_batches += 1
+                    if options["drain"] and (
+                        failed_batches >= MAX_FAILED_BATCHES
+                    ):
+                        raise CommandError(
+                            f"{failed_batches} batches in a row failed"
+                        )
+                    time.sleep(options["idle_sleep"])
+                    continue
+
+                failed_batches = 0
+                totals += outcomes
+                if not outcomes:
+                    if options["drain"]:
+                        break
+                    time.sleep(options["idle_sleep"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Placed {totals[QueuedOrder.Status.PLACED]} queued order(s), "
+            f"{totals[QueuedOrder.Status.FAILED]} failed"
+        ))
@@ -0,0 +1,30 @@
+from django.core.management import BaseCommand
+
+from station.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    """Django command to delete expired idempotency keys in batches.
+    Meant to run hourly or so from cron."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        reaped = 0
+        while True:
+            expired = list(
+                IdempotencyKey.objects.expired().values_list(
+                    "id", flat=True
+                )[:options["batch_size"]]
+            )
+            if not expired:
+                break
+
+            IdempotencyKey.objects.filter(id__in=expired).delete()
+            reaped += len(expired)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Reaped {reaped} expired idempotency key(s)")
+        )
@@ -0,0 +1,37 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from station.models import SeatHold, Trip
+
+
+class Command(BaseCommand):
+    """Django command to delete expired seat holds in batches. Meant to
+    run every minute or so from cron."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        reaped = 0
+        while True:
+            with transaction.atomic():
+                expired = list(
+                    SeatHold.objects.expired().order_by().values_list(
+                        "id", "trip"
+                    )[:options["batch_size"]]
+                )
+                if not expired:
+                    break
+
+                SeatHold.objects.filter(
+                    id__in=[hold_id for hold_id, _ in expired]
+                ).delete()
+                Trip.objects.filter(
+                    id__in={trip_id for _, trip_id in expired}
+                ).bump_version()
+            reaped += len(expired)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Reaped {reaped} expired seat hold(s)")
+        )
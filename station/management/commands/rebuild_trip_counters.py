@@ -0,0 +1,53 @@
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F
+
+from station.models import Trip
+
+
+class Command(BaseCommand):
+    """Django command to verify and rebuild denormalized trip counters."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report stale counters, exit with an error if any.",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        with transaction.atomic():
+            if not options["check"]:
+                # Orders lock their trips before adding to the counters,
+                # so none can commit between the count and the write.
+                list(
+                    Trip.objects.select_for_update()
+                    .order_by("id")
+                    .values_list("id")
+                )
+            stale = list(
+                Trip.objects.annotate(sold=Count("tickets"))
+                .exclude(tickets_sold=F("sold"))
+                .only("id", "tickets_sold")
+            )
+
+            for trip in stale:
+                self.stdout.write(
+                    f"Trip {trip.id}: counter {trip.tickets_sold}, "
+                    f"actual {trip.sold}"
+                )
+
+            if options["check"]:
+                if stale:
+                    raise CommandError(f"{len(stale)} stale trip counter(s)")
+                self.stdout.write(self.style.SUCCESS("Counters are in sync"))
+                return
+
+            for trip in stale:
+                trip.tickets_sold = trip.sold
+            Trip.objects.bulk_update(stale, ["tickets_sold"], batch_size=500)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {len(stale)} trip counter(s)")
+        )
@@ -0,0 +1,258 @@
+import multiprocessing
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.db import connections, OperationalError
+from django.db.models import Count, F
+from rest_framework.exceptions import ValidationError
+
+from station.exceptions import SeatConflict
+from station.models import Route, Station, Ticket, Train, TrainType, Trip
+from station.order_queue import enqueue_order, place_queued_orders
+from station.serializers import OrderSerializer
+
+
+def place_orders(
+    user_id, seats, seats_per_order, duration, seed, allocate, queued
+):
+    """Place random orders until duration runs out and count outcomes.
+
+    With allocate, orders give a passenger count and let the server pick
+    the seats. With queued, orders are only validated and queued, as the
+    order endpoint does while QUEUE_ORDERS is on."""
+    rng = random.Random(seed)
+    user = get_user_model().objects.get(id=user_id)
+    context = {"request": SimpleNamespace(user=user)}
+    outcomes = Counter()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        if allocate:
+            data = {"passengers": [
+                {"trip": rng.choice(seats)[0], "count": seats_per_order}
+            ]}
+        else:
+            data = {"tickets": [
+                {"trip": trip_id, "cargo": cargo, "seat": seat}
+                for trip_id, cargo, seat in rng.sample(seats, seats_per_order)
+            ]}
+        serializer = OrderSerializer(data=data, context=context)
+        try:
+            if queued:
+                enqueue_order(serializer, user)
+                outcomes["queued"] += 1
+            else:
+                serializer.is_valid(raise_exception=True)
+                serializer.save(user=user)
+                outcomes["placed"] += 1
+        except SeatConflict:
+            outcomes["conflicts"] += 1
+        except ValidationError:
+            outcomes["rejected"] += 1
+        except OperationalError:
+            outcomes["errors"] += 1
+
+    return outcomes
+
+
+def drain_queue(batch_size, duration):
+    """Place queued orders until duration runs out and the queue is
+    empty, or a batch fails after that, and count outcomes."""
+    outcomes = Counter()
+    deadline = time.monotonic() + duration
+    while True:
+        try:
+            processed = place_queued_orders(batch_size)
+        except OperationalError:
+            # Counts as an empty poll, so lock timeouts are only retried
+            # until the deadline.
+            outcomes["errors"] += 1
+            processed = Counter()
+
+        outcomes += processed
+        if not processed:
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(0.01)
+
+    return outcomes
+
+
+class Command(BaseCommand):
+    """Django command to hammer a few trips with concurrent orders from
+    several processes, then check that no seat was sold twice.
+
+    With --queue-workers, orders are queued instead and that many
+    processes place them like process_order_queue does, so the placed/s
+    of both modes can be compared.
+
+    Everything it creates is deleted afterwards unless --keep is given.
+    Run it against PostgreSQL: SQLite serializes writers and reports
+    lock timeouts instead."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=8)
+        parser.add_argument("--duration", type=float, default=10)
+        parser.add_argument(
+            "--trips",
+            type=int,
+            default=1,
+            help="Trips every order picks its seats from.",
+        )
+        parser.add_argument("--cargos", type=int, default=10)
+        parser.add_argument("--places", type=int, default=50)
+        parser.add_argument("--seats-per-order", type=int, default=2)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--queue-workers",
+            type=int,
+            default=0,
+            help="Queue orders and place them with this many workers.",
+        )
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--allocate",
+            action="store_true",
+            help="Order by passenger count instead of picking seats.",
+        )
+        parser.add_argument("--keep", action="store_true")
+
+    def handle(self, *args, **options):
+        """Handle the command."""
+        trips, users = self.create_fixture(options)
+        seats = [
+            (trip.id, cargo, seat)
+            for trip in trips
+            for cargo in range(1, options["cargos"] + 1)
+            for seat in range(1, options["places"] + 1)
+        ]
+        queued = options["queue_workers"] > 0
+        calls = [
+            (
+                place_orders,
+                (
+                    user.id,
+                    seats,
+                    options["seats_per_order"],
+                    options["duration"],
+                    options["seed"] + number,
+                    options["allocate"],
+                    queued,
+                ),
+            )
+            for number, user in enumerate(users)
+        ] + [
+            (drain_queue, (options["batch_size"], options["duration"]))
+        ] * options["queue_workers"]
+
+        started = time.perf_counter()
+        if options["processes"] == 1:
+            # Inline, one after another.
+            results = [function(*args) for function, args in calls]
+        else:
+            # Every worker must open its own database connection.
+            connections.close_all()
+            with multiprocessing.get_context("fork").Pool(
+                len(calls)
+            ) as pool:
+                results = [
+                    result.get()
+                    for result in [
+                        pool.apply_async(function, args)
+                        for function, args in calls
+                    ]
+                ]
+        if queued:
+            # Orders queued after the last worker saw an empty queue.
+            results.append(drain_queue(options["batch_size"], 0))
+        elapsed = time.perf_counter() - started
+
+        outcomes = sum(results, Counter())
+        conflicts = outcomes["conflicts"] + outcomes["failed"]
+        attempts = outcomes["placed"] + conflicts + outcomes["rejected"]
+        summary = (
+            f"{attempts} orders in {elapsed:.1f}s: "
+            f"{outcomes['placed'] / elapsed:.1f} placed/s, "
+            f"conflict rate {conflicts / max(attempts, 1):.1%}, "
+            f"{outcomes['errors']} database error(s)"
+        )
+        if queued:
+            summary += (
+                f", {outcomes['queued'] / options['duration']:.1f} queued/s"
+            )
+        self.stdout.write(summary)
+
+        try:
+            self.verify(trips)
+        finally:
+            if not options["keep"]:
+                self.delete_fixture(trips, users)
+
+    def verify(self, trips):
+        double_booked = Ticket.objects.filter(trip__in=trips).values(
+            "trip", "cargo", "seat"
+        ).annotate(count=Count("id")).filter(count__gt=1).count()
+        stale = Trip.objects.filter(
+            id__in=[trip.id for trip in trips]
+        ).annotate(sold=Count("tickets")).exclude(
+            tickets_sold=F("sold")
+        ).count()
+        sold = Ticket.objects.filter(trip__in=trips).count()
+
+        self.stdout.write(
+            f"{sold} seats sold, {double_booked} double booking(s), "
+            f"{stale} stale trip counter(s)"
+        )
+        if double_booked or stale:
+            raise CommandError("Seat bookings are inconsistent")
+        self.stdout.write(self.style.SUCCESS("No seat was sold twice"))
+
+    @staticmethod
+    def create_fixture(options):
+        train = Train.objects.create(
+            name="Stress",
+            cargo_num=options["cargos"],
+            places_in_cargo=options["places"],
+            train_type=TrainType.objects.create(name="Stress"),
+        )
+        route = Route.objects.create(
+            source=Station.objects.create(
+                name="Stress source", latitude=50, longitude=30
+            ),
+            destination=Station.objects.create(
+                name="Stress destination", latitude=50, longitude=31
+            ),
+            distance=100,
+        )
+        departure = datetime.now() + timedelta(days=365)
+        trips = [
+            Trip.objects.create(
+                route=route,
+                train=train,
+                departure_time=departure + timedelta(hours=number),
+                arrival_time=departure + timedelta(hours=number + 1),
+            )
+            for number in range(options["trips"])
+        ]
+        users = [
+            get_user_model().objects.create_user(
+                email=f"stress-{number}-{time.time_ns()}@example.com"
+            )
+            for number in range(options["processes"])
+        ]
+
+        return trips, users
+
+    @staticmethod
+    def delete_fixture(trips, users):
+        route, train = trips[0].route, trips[0].train
+        train.delete()
+        train.train_type.delete()
+        for user in users:
+            user.delete()
+        route.source.delete()
+        route.destination.delete()
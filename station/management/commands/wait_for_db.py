@@ -2,21 +2,62 @@ import time
 
 from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
+
+MAX_BACKOFF = 5
 
 
 class Command(BaseCommand):
     """Django command to pause execution until database is available."""
 
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60,
+            help="Seconds to keep retrying before giving up.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0.1,
+            help="First retry delay, doubled after every failure.",
+        )
+
     def handle(self, *args, **options):
         """Handle the command."""
         self.stdout.write("Waiting for database...")
-        db_conn = None
-        while not db_conn:
+        connection = connections[options["database"]]
+        deadline = time.monotonic() + options["timeout"]
+        delay = options["interval"]
+        while True:
+            started = time.perf_counter()
             try:
-                db_conn = connections["default"]
-            except OperationalError:
-                self.stdout.write("Database unavailable, waiting 1 second...")
-                time.sleep(1)
+                connection.ensure_connection()
+                connected = time.perf_counter()
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+                break
+            except OperationalError as error:
+                connection.close()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f"Database unavailable after "
+                        f"{options['timeout']:g} seconds: {error}"
+                    )
+                delay = min(delay, remaining)
+                self.stdout.write(
+                    f"Database unavailable, waiting {delay:.1f} seconds..."
+                )
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_BACKOFF)
 
-        self.stdout.write(self.style.SUCCESS("Database available!"))
+        finished = time.perf_counter()
+        self.stdout.write(self.style.SUCCESS(
+            f"Database available! Connected in "
+            f"{(connected - started) * 1000:.1f} ms, "
+            f"SELECT 1 took {(finished - connected) * 1000:.1f} ms"
+        ))
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.6 on 2026-10-18 02:35
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_tickets_sold(apps, schema_editor):
+    Trip = apps.get_model("station", "Trip")
+    trips = Trip.objects.annotate(sold=Count("tickets")).filter(sold__gt=0)
+    for trip in trips.iterator():
+        trip.tickets_sold = trip.sold
+        trip.save(update_fields=["tickets_sold"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("station", "0005_alter_station_latitude_alter_station_longitude"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trip",
+            name="tickets_sold",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_tickets_sold, migrations.RunPython.noop),
+    ]
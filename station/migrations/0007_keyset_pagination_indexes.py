@@ -0,0 +1,24 @@
+# Generated by Django 4.2.6 on 2026-10-18 02:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("station", "0006_trip_tickets_sold"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "created_at", "id"], name="order_user_created_at_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                fields=["departure_time", "id"], name="trip_departure_time_id_idx"
+            ),
+        ),
+    ]
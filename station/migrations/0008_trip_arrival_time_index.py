@@ -0,0 +1,16 @@
+# Generated by Django 4.2.6 on 2026-10-18 02:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("station", "0007_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(fields=["arrival_time"], name="trip_arrival_time_idx"),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.6 on 2026-10-18 02:50
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("station", "0008_trip_arrival_time_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Schedule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("departure_time", models.TimeField()),
+                ("duration", models.DurationField()),
+                (
+                    "weekdays",
+                    models.CharField(
+                        help_text="ISO weekdays the trip runs on, 1 is Monday (ex. 12345)",
+                        max_length=7,
+                        validators=[
+                            django.core.validators.RegexValidator("^[1-7]{1,7}$")
+                        ],
+                    ),
+                ),
+                ("valid_from", models.DateField()),
+                ("valid_until", models.DateField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="schedule",
+            name="crews",
+            field=models.ManyToManyField(blank=True, to="station.crew"),
+        ),
+        migrations.AddField(
+            model_name="schedule",
+            name="route",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, to="station.route"
+            ),
+        ),
+        migrations.AddField(
+            model_name="schedule",
+            name="train",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, to="station.train"
+            ),
+        ),
+        migrations.AddField(
+            model_name="trip",
+            name="schedule",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="trips",
+                to="station.schedule",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="trip",
+            constraint=models.UniqueConstraint(
+                fields=("schedule", "departure_time"),
+                name="unique_schedule_departure_time",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.6 on 2026-10-18 03:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("station", "0009_schedule"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trip",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.6 on 2026-10-18 03:07
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("station", "0010_trip_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SeatHold",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cargo", models.PositiveSmallIntegerField()),
+                ("seat", models.PositiveSmallIntegerField()),
+                ("expires_at", models.DateTimeField()),
+                (
+                    "trip",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="holds",
+                        to="station.trip",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="seat_holds",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["trip", "cargo", "seat"],
+                "indexes": [
+                    models.Index(fields=["expires_at"], name="seat_hold_expires_at_idx")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="seathold",
+            constraint=models.UniqueConstraint(
+                fields=("trip", "cargo", "seat"), name="unique_seat_hold"
+            ),
+        ),
+    ]
@@ -1,7 +1,22 @@
+from datetime import datetime, timedelta
+
 from django.conf import settings
-from django.core.validators import MinValueValidator, MaxValueValidator
+from django.core.validators import (
+    MinValueValidator,
+    MaxValueValidator,
+    RegexValidator,
+)
 from django.db import models
+from django.db.models import (
+    Count,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Subquery,
+)
+from django.db.models.functions import Coalesce, Now
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 
 
 class TrainType(models.Model):
@@ -78,19 +93,139 @@ class Crew(models.Model):
         return f"{self.first_name} {self.last_name}"
 
 
+class Schedule(models.Model):
+    route = models.ForeignKey(Route, on_delete=models.CASCADE)
+    train = models.ForeignKey(Train, on_delete=models.CASCADE)
+    departure_time = models.TimeField()
+    duration = models.DurationField()
+    weekdays = models.CharField(
+        max_length=7,
+        validators=[RegexValidator(r"^[1-7]{1,7}$")],
+        help_text="ISO weekdays the trip runs on, 1 is Monday (ex. 12345)",
+    )
+    valid_from = models.DateField()
+    valid_until = models.DateField()
+    crews = models.ManyToManyField(Crew, blank=True)
+
+    def __str__(self):
+        return (f"{str(self.route)} at {self.departure_time} "
+                f"({self.valid_from} - {self.valid_until})")
+
+    def clean(self):
+        if self.valid_until < self.valid_from:
+            raise ValidationError(
+                "Schedule must end on or after its first day"
+            )
+
+    def departures(self):
+        day = self.valid_from
+        while day <= self.valid_until:
+            if str(day.isoweekday()) in self.weekdays:
+                yield datetime.combine(day, self.departure_time)
+            day += timedelta(days=1)
+
+
+class TripQuerySet(models.QuerySet):
+    def with_seats_held(self):
+        held = SeatHold.objects.active().filter(
+            trip=OuterRef("pk")
+        ).order_by().values("trip").annotate(count=Count("id"))
+
+        return self.annotate(
+            seats_held=Coalesce(Subquery(held.values("count")), 0)
+        )
+
+    def with_tickets_available(self):
+        return self.with_seats_held().annotate(
+            tickets_available=(
+                F("train__cargo_num") * F("train__places_in_cargo")
+                - F("tickets_sold")
+                - F("seats_held")
+            )
+        )
+
+    def bump_version(self):
+        return self.update(version=F("version") + 1)
+
+
 class Trip(models.Model):
     route = models.ForeignKey(Route, on_delete=models.CASCADE)
     train = models.ForeignKey(Train, on_delete=models.CASCADE)
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     crews = models.ManyToManyField(Crew)
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+    version = models.PositiveIntegerField(default=1, editable=False)
+    schedule = models.ForeignKey(
+        Schedule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="trips",
+    )
+
+    objects = TripQuerySet.as_manager()
 
     def __str__(self):
         return (f"{str(self.route)} "
                 f"({self.departure_time} - {self.arrival_time})")
 
+    def save(
+        self,
+        force_insert=False,
+        force_update=False,
+        using=None,
+        update_fields=None,
+    ):
+        bumped = not self._state.adding
+        if bumped:
+            self.version = F("version") + 1
+            if update_fields is not None:
+                update_fields = {*update_fields, "version"}
+        super(Trip, self).save(
+            force_insert, force_update, using, update_fields
+        )
+        if bumped:
+            self.refresh_from_db(fields=["version"])
+
+    def taken_seats_query(self):
+        """(cargo, seat) pairs that are sold or actively held, in order."""
+        return self.tickets.order_by().values_list("cargo", "seat").union(
+            self.holds.active().order_by().values_list("cargo", "seat")
+        ).order_by("cargo", "seat")
+
+    def taken_seats(self):
+        taken = getattr(self, "loaded_taken_seats", None)
+        if taken is None:
+            taken = list(self.taken_seats_query())
+
+        return taken
+
+    async def aload_taken_seats(self):
+        """Load taken seats up front so serializers stay off the database
+        in async views."""
+        self.loaded_taken_seats = [
+            seat async for seat in self.taken_seats_query()
+        ]
+
     class Meta:
         ordering = ["-departure_time"]
+        indexes = [
+            models.Index(
+                fields=["departure_time", "id"],
+                name="trip_departure_time_id_idx",
+            ),
+            models.Index(
+                fields=["arrival_time"],
+                name="trip_arrival_time_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["schedule", "departure_time"],
+                name="unique_schedule_departure_time",
+            ),
+        ]
 
 
 class Order(models.Model):
@@ -104,6 +239,12 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "created_at", "id"],
+                name="order_user_created_at_id_idx",
+            ),
+        ]
 
 
 class Ticket(models.Model):
@@ -162,3 +303,146 @@ class Ticket(models.Model):
         return super(Ticket, self).save(
             force_insert, force_update, using, update_fields
         )
+
+
+class SeatHoldQuerySet(models.QuerySet):
+    """Holds expire by the database clock, which new holds also use, so
+    the clocks of the app servers never decide whether a seat is held."""
+
+    def active(self):
+        return self.filter(expires_at__gt=Now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=Now())
+
+
+class SeatHold(models.Model):
+    """Short lease on a seat while its buyer checks out."""
+
+    trip = models.ForeignKey(
+        Trip,
+        on_delete=models.CASCADE,
+        related_name="holds",
+        # Covered by the unique seat constraint.
+        db_index=False,
+    )
+    cargo = models.PositiveSmallIntegerField()
+    seat = models.PositiveSmallIntegerField()
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds",
+    )
+    expires_at = models.DateTimeField()
+
+    objects = SeatHoldQuerySet.as_manager()
+
+    @staticmethod
+    def new_expiry():
+        return ExpressionWrapper(
+            Now() + timedelta(seconds=settings.SEAT_HOLD_SECONDS),
+            output_field=models.DateTimeField(),
+        )
+
+    def __str__(self):
+        return (f"{str(self.trip)}(cargo: {self.cargo}, seat: {self.seat}, "
+                f"until {self.expires_at})")
+
+    class Meta:
+        ordering = ["trip", "cargo", "seat"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["trip", "cargo", "seat"],
+                name="unique_seat_hold",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["expires_at"],
+                name="seat_hold_expires_at_idx",
+            ),
+        ]
+
+
+class IdempotencyKeyQuerySet(models.QuerySet):
+    def expired(self):
+        return self.filter(expires_at__lte=Now())
+
+
+class IdempotencyKey(models.Model):
+    """Response to a request sent with an Idempotency-Key header, kept
+    so that retries with the same key get it back instead of running
+    the request again."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+        # Covered by the unique key constraint.
+        db_index=False,
+    )
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    expires_at = models.DateTimeField()
+
+    objects = IdempotencyKeyQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.key} ({self.user}, until {self.expires_at})"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"],
+                name="unique_idempotency_key",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["expires_at"],
+                name="idempotency_expires_at_idx",
+            ),
+        ]
+
+
+class QueuedOrder(models.Model):
+    """Order request accepted while orders are queued, waiting for the
+    process_order_queue worker to place it."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        PLACED = "placed"
+        FAILED = "failed"
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="queued_orders",
+    )
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    status = models.CharField(
+        max_length=7, choices=Status.choices, default=Status.PENDING
+    )
+    order = models.OneToOneField(
+        Order,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name="queued_order",
+    )
+    errors = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"{self.user} at {self.created_at} ({self.status})"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=models.Q(status="pending"),
+                name="queued_order_pending_idx",
+            ),
+        ]
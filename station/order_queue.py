@@ -0,0 +1,152 @@
+import logging
+from collections import Counter
+from datetime import datetime
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from station.allocation import LockedFreeSeats
+from station.exceptions import SeatConflict
+from station.models import QueuedOrder
+from station.serializers import (
+    OrderSerializer,
+    QueuedOrderSerializer,
+    locked_trips,
+    order_trip_ids,
+    reject_sold_out,
+    update_trip_counters,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_order(serializer, user):
+    """Validate an order payload and queue it for the worker."""
+    serializer.is_valid(raise_exception=True)
+
+    return QueuedOrder.objects.create(
+        user=user, payload=serializer.initial_data
+    )
+
+
+def validate_queued(batch):
+    """Validate the payloads of queued orders again, since holds may have
+    expired while they waited. Failed ones are marked as such."""
+    valid = []
+    for queued in batch:
+        serializer = OrderSerializer(
+            data=queued.payload,
+            context={"request": SimpleNamespace(user=queued.user)},
+        )
+        if serializer.is_valid():
+            valid.append(
+                (queued, {**serializer.validated_data, "user": queued.user})
+            )
+        else:
+            queued.status = QueuedOrder.Status.FAILED
+            queued.errors = serializer.errors
+
+    return valid
+
+
+def place_queued_orders(batch_size):
+    """Place up to batch_size queued orders in one transaction and count
+    them by outcome.
+
+    Pending orders are claimed with SKIP LOCKED, so several workers can
+    drain the queue together. All trips of the batch are locked once in
+    id order, and the tickets every trip sold are added to its counter
+    in one update, however many orders they came from. Every order is
+    placed in its own savepoint, so one that fails is marked as failed
+    without rolling back the rest of the batch.
+    """
+    with transaction.atomic():
+        batch = list(
+            QueuedOrder.objects.select_for_update(
+                skip_locked=True, of=("self",)
+            )
+            .filter(status=QueuedOrder.Status.PENDING)
+            .select_related("user")
+            .order_by("id")[:batch_size]
+        )
+        valid = validate_queued(batch)
+
+        trips = locked_trips(set().union(*(
+            order_trip_ids(data["tickets"], data["passengers"])
+            for _, data in valid
+        )))
+        free = {trip_id: free for trip_id, (free, _) in trips.items()}
+        free_seats = LockedFreeSeats(
+            {trip_id: version for trip_id, (_, version) in trips.items()}
+        )
+        sold = Counter()
+        for queued, data in valid:
+            try:
+                with transaction.atomic():
+                    reject_sold_out(
+                        data["tickets"], data["passengers"], free
+                    )
+                    order, order_sold = OrderSerializer.place(
+                        data, free_seats
+                    )
+            except Exception as exc:
+                if isinstance(exc, SeatConflict):
+                    queued.errors = exc.detail
+                else:
+                    # E.g. a trip deleted since the order was validated.
+                    logger.exception(
+                        "Could not place queued order %s", queued.id
+                    )
+                    queued.errors = {
+                        "detail": "The order could not be placed."
+                    }
+                # Seats may have been taken out of the indexes already.
+                free_seats.forget(
+                    order_trip_ids(data["tickets"], data["passengers"])
+                )
+                queued.status = QueuedOrder.Status.FAILED
+                continue
+
+            for trip_id, count in order_sold.items():
+                free[trip_id] -= count
+            sold += order_sold
+            queued.status = QueuedOrder.Status.PLACED
+            queued.order = order
+
+        update_trip_counters(sold)
+        free_seats.remember_on_commit()
+
+        processed_at = datetime.now()
+        for queued in batch:
+            queued.processed_at = processed_at
+        QueuedOrder.objects.bulk_update(
+            batch, ["status", "order", "errors", "processed_at"]
+        )
+
+    return Counter(queued.status for queued in batch)
+
+
+class QueuedCreateMixin:
+    """Queue valid orders for the process_order_queue worker instead of
+    placing them while settings.QUEUE_ORDERS is on, and answer 202 with
+    the URL to poll for the outcome."""
+
+    def create(self, request, *args, **kwargs):
+        if not settings.QUEUE_ORDERS:
+            return super().create(request, *args, **kwargs)
+
+        queued = enqueue_order(
+            self.get_serializer(data=request.data), request.user
+        )
+        data = QueuedOrderSerializer(
+            queued, context=self.get_serializer_context()
+        ).data
+
+        return Response(
+            data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": data["url"]},
+        )
@@ -0,0 +1,100 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+from station.checks import cache_is_shared
+from station.shared_cache import shared_cache
+
+use_replica = ContextVar("use_replica", default=False)
+
+
+@contextmanager
+def primary():
+    """Send every query in the block to the primary database."""
+    token = use_replica.set(False)
+    try:
+        yield
+    finally:
+        use_replica.reset(token)
+
+
+def pin_key(user):
+    return f"replica-pin:{user.pk}"
+
+
+def pin_to_primary(user):
+    """Keep the user's reads on the primary until replicas catch up."""
+    if settings.DATABASE_REPLICAS:
+        shared_cache().set(
+            pin_key(user), True, settings.REPLICA_PIN_SECONDS
+        )
+
+
+def pinned_to_primary(user):
+    return (
+        not settings.DATABASE_REPLICAS
+        # Pins only reach the other workers through a shared cache.
+        or not cache_is_shared()
+        or not user.is_authenticated
+        or shared_cache().get(pin_key(user), False)
+    )
+
+
+class ReplicaRouter:
+    """Route reads to a random replica while ``use_replica`` is set.
+
+    Writes and reads inside a transaction on the primary always use the
+    primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            use_replica.get()
+            and settings.DATABASE_REPLICAS
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return random.choice(settings.DATABASE_REPLICAS)
+
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """Serve safe requests from a replica unless the user has written
+    something in the last REPLICA_PIN_SECONDS."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with primary():
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in SAFE_METHODS
+            and not pinned_to_primary(request.user)
+        ):
+            use_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user)
+
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,95 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+
+from station.replicas import primary
+from station.shared_cache import bump_generation, get_generations
+
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+
+def generation_key(model):
+    return f"response-generation:{model._meta.label_lower}"
+
+
+def generations(models):
+    """Return the current generation token of every model, in order."""
+    return get_generations([generation_key(model) for model in models])
+
+
+def etag_matches(request, etag):
+    return etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+
+
+def _bump(model):
+    bump_generation(generation_key(model))
+
+
+def invalidate_responses(model):
+    """Drop every cached response built from rows of model."""
+    # Bump again on commit, in case another process cached a response
+    # built from the rows visible before this transaction committed.
+    _bump(model)
+    transaction.on_commit(lambda: _bump(model))
+
+
+class CachedListMixin:
+    """Serve list responses from the cache as rendered bytes.
+
+    The key covers the endpoint, query string, negotiated media type and
+    the generation token of every model in ``cache_models``, so saving or
+    deleting any of them makes older entries unreachable. Responses carry
+    an ETag, and a matching If-None-Match gets 304 Not Modified.
+    """
+
+    cache_models = ()
+    cache_formats = ("json",)
+
+    def response_cache_key(self, request):
+        digest = hashlib.md5("\n".join([
+            request.path,
+            request.META.get("QUERY_STRING", ""),
+            request.accepted_media_type,
+            *generations(self.cache_models),
+        ]).encode()).hexdigest()
+
+        return f"response:{self.basename}:{digest}"
+
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format not in self.cache_formats:
+            return super().list(request, *args, **kwargs)
+
+        key = self.response_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type, etag = cached
+            if etag_matches(request, etag):
+                response = HttpResponseNotModified()
+            else:
+                response = HttpResponse(content, content_type=content_type)
+            response["ETag"] = etag
+            return response
+
+        # Build from the primary so a lagging replica cannot be cached
+        # under the new generation.
+        with primary():
+            response = super().list(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+
+        response = self.finalize_response(request, response, *args, **kwargs)
+        response.render()
+        etag = quote_etag(hashlib.md5(response.content).hexdigest())
+        cache.set(
+            key,
+            (response.content, response["Content-Type"], etag),
+            RESPONSE_CACHE_TIMEOUT,
+        )
+        if etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        response["ETag"] = etag
+
+        return response
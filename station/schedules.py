@@ -0,0 +1,50 @@
+from django.db import transaction
+
+from station.connections import timetable
+from station.models import Schedule, Trip
+
+EXPANSION_BATCH_SIZE = 1000
+
+
+def expand_schedule(schedule):
+    """Create every trip of the schedule that does not exist yet, with the
+    schedule's crews, and return the created trips.
+
+    Safe to re-run: trips already generated for a departure are skipped.
+    """
+    with transaction.atomic():
+        schedule = Schedule.objects.select_for_update().get(pk=schedule.pk)
+        existing = set(
+            schedule.trips.order_by().values_list(
+                "departure_time", flat=True
+            )
+        )
+        trips = Trip.objects.bulk_create(
+            (
+                Trip(
+                    route_id=schedule.route_id,
+                    train_id=schedule.train_id,
+                    schedule=schedule,
+                    departure_time=departure_time,
+                    arrival_time=departure_time + schedule.duration,
+                )
+                for departure_time in schedule.departures()
+                if departure_time not in existing
+            ),
+            batch_size=EXPANSION_BATCH_SIZE,
+        )
+
+        crew_ids = list(schedule.crews.values_list("id", flat=True))
+        Trip.crews.through.objects.bulk_create(
+            (
+                Trip.crews.through(trip_id=trip.id, crew_id=crew_id)
+                for trip in trips
+                for crew_id in crew_ids
+            ),
+            batch_size=EXPANSION_BATCH_SIZE,
+        )
+
+        if trips:
+            timetable.invalidate()
+
+    return trips
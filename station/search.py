@@ -0,0 +1,80 @@
+import re
+import unicodedata
+from bisect import bisect_left
+
+from station.indexes import ModelIndex
+from station.models import Station
+
+STATION_NAME_ALIASES = {
+    "kiev": "kyiv",
+    "lvov": "lviv",
+    "odessa": "odesa",
+    "kharkov": "kharkiv",
+    "dnepr": "dnipro",
+    "zaporozhye": "zaporizhzhia",
+}
+
+
+def normalize_name(name):
+    """Case-fold, strip diacritics and map transliteration aliases."""
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    plain = "".join(
+        char for char in decomposed if not unicodedata.combining(char)
+    )
+
+    return "".join(
+        STATION_NAME_ALIASES.get(word, word)
+        for word in re.split(r"(\W+)", plain)
+    )
+
+
+def name_prefixes(name):
+    """Return name and its every suffix starting at a word boundary."""
+    return [name[word.start():] for word in re.finditer(r"\w+", name)]
+
+
+class StationNameIndex(ModelIndex):
+    """Normalized station names, plus a sorted array of name prefixes."""
+
+    cache_key = "station:index:names"
+
+    def build(self):
+        names = []
+        prefixes = []
+        for station_id, name in Station.objects.values_list("id", "name"):
+            normalized = normalize_name(name)
+            names.append((normalized, station_id))
+            prefixes.extend(
+                (prefix, station_id, name)
+                for prefix in name_prefixes(normalized)
+            )
+        prefixes.sort()
+
+        return names, [prefix for prefix, *_ in prefixes], prefixes
+
+    def search(self, query):
+        """Return ids of stations whose normalized name contains query."""
+        needle = normalize_name(query)
+        names, _, _ = self.get()
+
+        return [station_id for name, station_id in names if needle in name]
+
+    def autocomplete(self, query, limit):
+        """Return up to limit (id, name) of stations with a word starting
+        with query, in alphabetical order of the matched word."""
+        needle = normalize_name(query).strip()
+        if not needle:
+            return []
+
+        _, keys, prefixes = self.get()
+        found = {}
+        for position in range(bisect_left(keys, needle), len(keys)):
+            prefix, station_id, name = prefixes[position]
+            if not prefix.startswith(needle) or len(found) == limit:
+                break
+            found.setdefault(station_id, name)
+
+        return list(found.items())
+
+
+station_names = StationNameIndex()
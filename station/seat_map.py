@@ -0,0 +1,63 @@
+from base64 import b64encode
+
+
+class SeatMap:
+    """Seat occupancy of a trip stored as one bitset per cargo.
+
+    Seat ``n`` of a cargo is bit ``(n - 1) % 8`` (least significant first)
+    of byte ``(n - 1) // 8`` in that cargo's bitset.
+    """
+
+    def __init__(self, cargo_num, places_in_cargo, taken=()):
+        self.cargo_num = cargo_num
+        self.places_in_cargo = places_in_cargo
+        self.row_size = (places_in_cargo + 7) // 8
+        self.bits = bytearray(self.row_size * cargo_num)
+        for cargo, seat in taken:
+            self.take(cargo, seat)
+
+    @classmethod
+    def for_trip(cls, trip):
+        return cls(
+            trip.train.cargo_num,
+            trip.train.places_in_cargo,
+            trip.taken_seats(),
+        )
+
+    def _position(self, cargo, seat):
+        index = (cargo - 1) * self.row_size + (seat - 1) // 8
+        return index, 1 << ((seat - 1) % 8)
+
+    def take(self, cargo, seat):
+        index, mask = self._position(cargo, seat)
+        self.bits[index] |= mask
+
+    def is_taken(self, cargo, seat):
+        index, mask = self._position(cargo, seat)
+        return bool(self.bits[index] & mask)
+
+    def cargo_bits(self, cargo):
+        start = (cargo - 1) * self.row_size
+        return bytes(self.bits[start:start + self.row_size])
+
+    def to_bitmap(self):
+        return [
+            b64encode(self.cargo_bits(cargo)).decode()
+            for cargo in range(1, self.cargo_num + 1)
+        ]
+
+    def to_ranges(self):
+        """Return taken seats of every cargo as inclusive [first, last]."""
+        cargos = []
+        for cargo in range(1, self.cargo_num + 1):
+            ranges = []
+            for seat in range(1, self.places_in_cargo + 1):
+                if not self.is_taken(cargo, seat):
+                    continue
+                if ranges and ranges[-1][1] == seat - 1:
+                    ranges[-1][1] = seat
+                else:
+                    ranges.append([seat, seat])
+            cargos.append(ranges)
+
+        return cargos
@@ -1,6 +1,15 @@
-from django.db import transaction
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction, IntegrityError
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
+from django.db.models.functions import Now
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from station.allocation import LockedFreeSeats
+from station.exceptions import SeatConflict
 from station.models import (
     TrainType,
     Train,
@@ -10,7 +19,147 @@ from station.models import (
     Trip,
     Order,
     Ticket,
+    Schedule,
+    SeatHold,
+    QueuedOrder,
 )
+from station.seat_map import SeatMap
+
+
+def seat_key(ticket_data):
+    return ticket_data["trip"].id, ticket_data["cargo"], ticket_data["seat"]
+
+
+def seat_errors(tickets_data, reason):
+    return [
+        f"Seat {ticket_data['seat']} in cargo {ticket_data['cargo']} "
+        f"of trip {ticket_data['trip'].id} {reason}"
+        for ticket_data in tickets_data
+    ]
+
+
+def seats_filter(tickets_data):
+    seats = Q()
+    for ticket_data in tickets_data:
+        seats |= Q(
+            trip=ticket_data["trip"],
+            cargo=ticket_data["cargo"],
+            seat=ticket_data["seat"]
+        )
+
+    return seats
+
+
+def matching_seats(queryset, tickets_data):
+    """Return the tickets_data entries whose seat has a row in queryset."""
+    found = set(
+        queryset.filter(seats_filter(tickets_data)).values_list(
+            "trip", "cargo", "seat"
+        )
+    )
+
+    return [
+        ticket_data
+        for ticket_data in tickets_data
+        if seat_key(ticket_data) in found
+    ]
+
+
+def passenger_errors(passengers):
+    return [
+        f"Trip {passenger['trip'].id} has fewer than "
+        f"{passenger['count']} free seats"
+        for passenger in passengers
+    ]
+
+
+def order_trip_ids(tickets_data, passengers=()):
+    trip_ids = {ticket_data["trip"].id for ticket_data in tickets_data}
+    trip_ids.update(passenger["trip"].id for passenger in passengers)
+
+    return trip_ids
+
+
+def locked_trips(trip_ids):
+    """Lock trips and return the free seats and version of each.
+
+    Rows are locked in id order, so concurrent orders spanning several
+    trips always wait on each other instead of deadlocking.
+    """
+    return {
+        trip_id: (free, version)
+        for trip_id, free, version in Trip.objects.select_for_update(
+            of=("self",)
+        )
+        .filter(id__in=trip_ids)
+        .order_by("id")
+        .annotate(free=(
+            F("train__cargo_num") * F("train__places_in_cargo")
+            - F("tickets_sold")
+        ))
+        .values_list("id", "free", "version")
+    }
+
+
+def reject_sold_out(tickets_data, passengers, free):
+    sold_out = [
+        ticket_data
+        for ticket_data in tickets_data
+        if free[ticket_data["trip"].id] <= 0
+    ]
+    if sold_out:
+        raise SeatConflict({"tickets": seat_errors(
+            sold_out, "is not available, the trip is sold out"
+        )})
+    short = [
+        passenger
+        for passenger in passengers
+        if free[passenger["trip"].id] < passenger["count"]
+    ]
+    if short:
+        raise SeatConflict({"passengers": passenger_errors(short)})
+
+
+def lock_trips(tickets_data, passengers=()):
+    """Lock the trips of tickets_data and passengers and reject orders
+    that do not fit into them. Return the version of every locked trip.
+    """
+    trips = locked_trips(order_trip_ids(tickets_data, passengers))
+    reject_sold_out(
+        tickets_data,
+        passengers,
+        {trip_id: free for trip_id, (free, _) in trips.items()},
+    )
+
+    return {trip_id: version for trip_id, (_, version) in trips.items()}
+
+
+def update_trip_counters(sold):
+    """Add sold tickets per trip id to the counters of locked trips."""
+    for trip_id, count in sold.items():
+        Trip.objects.filter(id=trip_id).update(
+            tickets_sold=F("tickets_sold") + count,
+            version=F("version") + 1,
+        )
+
+
+def reject_taken_seats(tickets_data):
+    taken = matching_seats(Ticket.objects, tickets_data)
+    if taken:
+        raise SeatConflict(
+            {"tickets": seat_errors(taken, "is already taken")}
+        )
+
+
+def duplicate_seats(tickets_data):
+    seats = set()
+    duplicates = []
+    for ticket_data in tickets_data:
+        if seat_key(ticket_data) in seats:
+            duplicates.append(ticket_data)
+        seats.add(seat_key(ticket_data))
+
+    return duplicates
 
 
 class TrainTypeSerializer(serializers.ModelSerializer):
@@ -42,6 +191,26 @@ class StationSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "latitude", "longitude")
 
 
+class StationAutocompleteSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Station
+        fields = ("id", "name")
+
+
+class JourneySerializer(serializers.Serializer):
+    distance = serializers.IntegerField()
+    stations = StationAutocompleteSerializer(many=True)
+    routes = serializers.ListField(child=serializers.IntegerField())
+
+
+class NearbyStationSerializer(StationSerializer):
+    distance = serializers.FloatField(help_text="Kilometres")
+
+    class Meta:
+        model = Station
+        fields = ("id", "name", "latitude", "longitude", "distance")
+
+
 class RouteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Route
@@ -94,6 +263,41 @@ class TripSerializer(serializers.ModelSerializer):
         )
 
 
+class ScheduleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Schedule
+        fields = (
+            "id",
+            "route",
+            "train",
+            "departure_time",
+            "duration",
+            "weekdays",
+            "valid_from",
+            "valid_until",
+            "crews",
+        )
+
+    def validate(self, attrs):
+        data = super(ScheduleSerializer, self).validate(attrs=attrs)
+        valid_from = attrs.get("valid_from", getattr(
+            self.instance, "valid_from", None
+        ))
+        valid_until = attrs.get("valid_until", getattr(
+            self.instance, "valid_until", None
+        ))
+        if valid_until < valid_from:
+            raise serializers.ValidationError(
+                {"valid_until": "Schedule must end on or after its first day"}
+            )
+
+        return data
+
+
+class ScheduleExpansionSerializer(serializers.Serializer):
+    created = serializers.IntegerField(read_only=True)
+
+
 class TripListSerializer(TripSerializer):
     route_source = serializers.CharField(source="route.source.name")
     route_destination = serializers.CharField(source="route.destination.name")
@@ -113,7 +317,29 @@ class TripListSerializer(TripSerializer):
         )
 
 
+class OrderTripField(serializers.PrimaryKeyRelatedField):
+    """Trip lookup that loads each distinct trip of an order only once."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.trips = {}
+
+    def to_internal_value(self, data):
+        key = str(data)
+        if key not in self.trips:
+            self.trips[key] = super().to_internal_value(data)
+        return self.trips[key]
+
+
+class ConnectionSerializer(serializers.Serializer):
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    trips = TripListSerializer(many=True)
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    trip = OrderTripField(queryset=Trip.objects.select_related("train"))
+
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
         Ticket.validate_cargo(
@@ -132,6 +358,9 @@ class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
         fields = ("id", "cargo", "seat", "trip")
+        # Seat uniqueness is checked once per order in OrderSerializer
+        # instead of with a SELECT per ticket.
+        validators = []
 
 
 class TicketListSerializer(TicketSerializer):
@@ -150,11 +379,7 @@ class TripDetailSerializer(TripSerializer):
     crews = serializers.SlugRelatedField(
         many=True, slug_field="full_name", queryset=Crew.objects.all()
     )
-    taken_seats = TicketSeatSerializer(
-        many=True,
-        read_only=True,
-        source="tickets"
-    )
+    taken_seats = serializers.SerializerMethodField()
 
     class Meta:
         model = Trip
@@ -168,22 +393,314 @@ class TripDetailSerializer(TripSerializer):
             "taken_seats"
         )
 
+    @extend_schema_field(TicketSeatSerializer(many=True))
+    def get_taken_seats(self, trip):
+        return [
+            {"cargo": cargo, "seat": seat}
+            for cargo, seat in trip.taken_seats()
+        ]
+
+
+class TripSeatMapSerializer(TripDetailSerializer):
+    seat_map = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Trip
+        fields = (
+            "id",
+            "route",
+            "train",
+            "departure_time",
+            "arrival_time",
+            "crews",
+            "seat_map"
+        )
+
+    def get_seat_map(self, trip):
+        seat_map = SeatMap.for_trip(trip)
+        encoding = self.context.get("seat_map_encoding", "bitmap")
+
+        return {
+            "encoding": encoding,
+            "cargo_num": seat_map.cargo_num,
+            "places_in_cargo": seat_map.places_in_cargo,
+            "cargos": (
+                seat_map.to_ranges()
+                if encoding == "ranges"
+                else seat_map.to_bitmap()
+            ),
+        }
+
+
+class SeatHoldListSerializer(serializers.ListSerializer):
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("allow_empty", False)
+        super().__init__(*args, **kwargs)
+
+    def validate(self, attrs):
+        duplicates = duplicate_seats(attrs)
+        if duplicates:
+            raise serializers.ValidationError(
+                seat_errors(duplicates, "is held more than once")
+            )
+
+        return attrs
+
+    @staticmethod
+    def reject_too_many_holds(user, count):
+        # Locking the user keeps concurrent requests of one customer
+        # from passing the check together.
+        get_user_model().objects.select_for_update().filter(
+            id=user.id
+        ).values_list("id").get()
+        held = SeatHold.objects.active().filter(user=user).count()
+        if held + count > settings.MAX_ACTIVE_HOLDS:
+            raise serializers.ValidationError([
+                f"At most {settings.MAX_ACTIVE_HOLDS} seats can be held "
+                f"at once, {held} already are"
+            ])
+
+    def create(self, validated_data):
+        user = self.context["request"].user
+        try:
+            with transaction.atomic():
+                self.reject_too_many_holds(user, len(validated_data))
+                free_seats = LockedFreeSeats(lock_trips(validated_data))
+                reject_taken_seats(validated_data)
+                free_seats.take(validated_data)
+                SeatHold.objects.expired().filter(
+                    seats_filter(validated_data)
+                ).delete()
+
+                # Expiry is set by the database, so read it back.
+                hold_ids = [
+                    hold.id
+                    for hold in SeatHold.objects.bulk_create(
+                        SeatHold(
+                            user=user,
+                            expires_at=SeatHold.new_expiry(),
+                            **hold_data
+                        )
+                        for hold_data in validated_data
+                    )
+                ]
+                Trip.objects.filter(id__in={
+                    hold_data["trip"].id for hold_data in validated_data
+                }).bump_version()
+                free_seats.remember_on_commit()
+        except IntegrityError:
+            raise SeatConflict({"tickets": seat_errors(
+                matching_seats(SeatHold.objects, validated_data),
+                "is held by another customer"
+            )})
+
+        return list(SeatHold.objects.filter(id__in=hold_ids).order_by("id"))
+
+
+class SeatHoldSerializer(TicketSerializer):
+    class Meta:
+        model = SeatHold
+        fields = ("id", "trip", "cargo", "seat", "expires_at")
+        read_only_fields = ("expires_at",)
+        # Seat conflicts are checked once per request by the list
+        # serializer instead of with a SELECT per hold.
+        validators = []
+        list_serializer_class = SeatHoldListSerializer
+
+
+class PassengerSerializer(serializers.Serializer):
+    trip = OrderTripField(queryset=Trip.objects.select_related("train"))
+    count = serializers.IntegerField(min_value=1)
+
 
 class OrderSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
+    tickets = TicketSerializer(
+        many=True, read_only=False, allow_empty=False, required=False
+    )
+    holds = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        required=False,
+        write_only=True,
+        help_text="Ids of active seat holds to turn into tickets.",
+    )
+    passengers = PassengerSerializer(
+        many=True,
+        allow_empty=False,
+        required=False,
+        write_only=True,
+        help_text="Trips to book by passenger count. The best free seats "
+                  "are picked, next to each other when possible.",
+    )
 
     class Meta:
         model = Order
-        fields = ("id", "created_at", "tickets")
+        fields = ("id", "created_at", "tickets", "holds", "passengers")
+
+    def validate_holds(self, hold_ids):
+        holds = SeatHold.objects.active().filter(
+            id__in=hold_ids, user=self.context["request"].user
+        ).select_related("trip")
+        found = {hold.id: hold for hold in holds}
+        missing = [hold_id for hold_id in hold_ids if hold_id not in found]
+        if missing:
+            raise serializers.ValidationError([
+                f"Hold {hold_id} does not exist or has expired"
+                for hold_id in missing
+            ])
+
+        return [found[hold_id] for hold_id in dict.fromkeys(hold_ids)]
+
+    def validate(self, attrs):
+        data = super(OrderSerializer, self).validate(attrs=attrs)
+        # Held seats were validated when they were held.
+        data["tickets"] = data.get("tickets", []) + [
+            {"trip": hold.trip, "cargo": hold.cargo, "seat": hold.seat}
+            for hold in data.pop("holds", [])
+        ]
+        data["passengers"] = data.get("passengers", [])
+        if not data["tickets"] and not data["passengers"]:
+            raise serializers.ValidationError(
+                {"tickets": "This field is required."}
+            )
+        duplicates = duplicate_seats(data["tickets"])
+        if duplicates:
+            raise serializers.ValidationError({"tickets": seat_errors(
+                duplicates, "is booked more than once"
+            )})
+        self.validate_passenger_trips(data["passengers"])
+
+        return data
+
+    @staticmethod
+    def validate_passenger_trips(passengers):
+        """Each trip may be listed once; allocation skips seats chosen
+        in tickets, which are taken out of the free-seat index first."""
+        errors = []
+        listed = set()
+        for passenger in passengers:
+            trip_id = passenger["trip"].id
+            if trip_id in listed:
+                errors.append(f"Trip {trip_id} is listed more than once")
+            listed.add(trip_id)
+
+        if errors:
+            raise serializers.ValidationError({"passengers": errors})
+
+    @staticmethod
+    def allocate_seats(passengers, free_seats):
+        """Pick seats for passengers from the free-seat indexes of their
+        locked trips."""
+        tickets_data = []
+        short = []
+        for passenger in passengers:
+            trip = passenger["trip"]
+            seats = free_seats.allocate(trip, passenger["count"])
+            if seats is None:
+                short.append(passenger)
+                continue
+
+            tickets_data += [
+                {"trip": trip, "cargo": cargo, "seat": seat}
+                for cargo, seat in seats
+            ]
+
+        if short:
+            raise SeatConflict({"passengers": passenger_errors(short)})
+
+        return tickets_data
+
+    @staticmethod
+    def release_holds(tickets_data, user):
+        """Drop holds on the ordered seats, refusing seats another
+        customer holds."""
+        holds = SeatHold.objects.filter(
+            seats_filter(tickets_data)
+        ).annotate(
+            expired=ExpressionWrapper(
+                Q(expires_at__lte=Now()), output_field=BooleanField()
+            )
+        ).values_list("id", "trip", "cargo", "seat", "user", "expired")
+        released = []
+        held = set()
+        for hold_id, trip, cargo, seat, holder, expired in holds:
+            if holder == user.id or expired:
+                released.append(hold_id)
+            else:
+                held.add((trip, cargo, seat))
+
+        if held:
+            raise SeatConflict({"tickets": seat_errors(
+                [
+                    ticket_data
+                    for ticket_data in tickets_data
+                    if seat_key(ticket_data) in held
+                ],
+                "is held by another customer"
+            )})
+        if released:
+            SeatHold.objects.filter(id__in=released).delete()
+
+    @classmethod
+    def place(cls, validated_data, free_seats):
+        """Book an order into trips the caller has locked. Return the
+        order and the number of tickets it sold per trip."""
+        free_seats.take(validated_data["tickets"])
+        tickets_data = validated_data["tickets"] + cls.allocate_seats(
+            validated_data["passengers"], free_seats
+        )
+        try:
+            with transaction.atomic():
+                # Also catches seats sold outside the order path since
+                # the free-seat index was built.
+                reject_taken_seats(tickets_data)
+                cls.release_holds(tickets_data, validated_data["user"])
+                order = Order.objects.create(user=validated_data["user"])
+                Ticket.objects.bulk_create(
+                    Ticket(order=order, **ticket_data)
+                    for ticket_data in tickets_data
+                )
+        except IntegrityError:
+            # Tickets written outside the order path do not lock trips.
+            raise SeatConflict({"tickets": seat_errors(
+                matching_seats(Ticket.objects, tickets_data),
+                "is already taken"
+            )})
+
+        return order, Counter(
+            ticket_data["trip"].id for ticket_data in tickets_data
+        )
 
     def create(self, validated_data):
         with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
-            order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
-            return order
+            free_seats = LockedFreeSeats(lock_trips(
+                validated_data["tickets"], validated_data["passengers"]
+            ))
+            order, sold = self.place(validated_data, free_seats)
+            update_trip_counters(sold)
+            free_seats.remember_on_commit()
+
+        return order
 
 
 class OrderListSerializer(OrderSerializer):
     tickets = TicketListSerializer(many=True, read_only=True)
+
+
+class QueuedOrderSerializer(serializers.ModelSerializer):
+    url = serializers.HyperlinkedIdentityField(
+        view_name="station:queuedorder-detail"
+    )
+    order = OrderSerializer(read_only=True)
+
+    class Meta:
+        model = QueuedOrder
+        fields = (
+            "id",
+            "url",
+            "status",
+            "order",
+            "errors",
+            "created_at",
+            "processed_at",
+        )
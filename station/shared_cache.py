@@ -0,0 +1,52 @@
+"""Cache entries every server process must see.
+
+Generation tokens, replica pins and free-seat indexes live in the
+``shared`` cache alias, which is Redis when REDIS_URL is set. Generation
+tokens are also kept in the process-local default cache for
+GENERATION_LOCAL_SECONDS, so most requests never leave the process.
+"""
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache, caches
+
+SHARED_CACHE_ALIAS = "shared"
+
+
+def shared_cache():
+    return caches[SHARED_CACHE_ALIAS]
+
+
+def local_key(key):
+    return f"local:{key}"
+
+
+def get_generations(keys):
+    """Return the current generation token of every key, in order."""
+    local = cache.get_many([local_key(key) for key in keys])
+    tokens = {
+        key: local[local_key(key)] for key in keys if local_key(key) in local
+    }
+    missing = [key for key in keys if key not in tokens]
+    if missing:
+        shared = shared_cache()
+        fetched = shared.get_many(missing)
+        for key in missing:
+            if key not in fetched:
+                shared.add(key, uuid4().hex, None)
+                fetched[key] = shared.get(key)
+        cache.set_many(
+            {local_key(key): fetched[key] for key in missing},
+            settings.GENERATION_LOCAL_SECONDS,
+        )
+        tokens.update(fetched)
+
+    return [tokens[key] for key in keys]
+
+
+def bump_generation(key):
+    """Replace the generation token of key. Other processes notice
+    within GENERATION_LOCAL_SECONDS."""
+    token = uuid4().hex
+    shared_cache().set(key, token, None)
+    cache.set(local_key(key), token, settings.GENERATION_LOCAL_SECONDS)
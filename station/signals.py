@@ -0,0 +1,107 @@
+from django.db.models import F
+from django.db.models.signals import (
+    post_save,
+    post_delete,
+    pre_delete,
+    m2m_changed,
+)
+from django.dispatch import receiver
+
+from station.connections import timetable
+from station.geo import station_grid
+from station.journeys import route_graph
+from station.models import (
+    TrainType,
+    Train,
+    Station,
+    Route,
+    Crew,
+    Trip,
+    Ticket,
+)
+from station.response_cache import invalidate_responses
+from station.search import station_names
+
+
+@receiver([post_save, post_delete], sender=Station)
+def invalidate_station_indexes(sender, created=False, **kwargs):
+    station_names.invalidate()
+    station_grid.invalidate()
+    if not created:
+        route_graph.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Route)
+def update_route_graph(sender, created=False, **kwargs):
+    # Rebuilt rather than extended: routes do not commit in id order.
+    route_graph.invalidate()
+    if not created:
+        timetable.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Trip)
+def invalidate_timetable(sender, **kwargs):
+    timetable.invalidate()
+
+
+@receiver([post_save, post_delete], sender=TrainType)
+@receiver([post_save, post_delete], sender=Train)
+@receiver([post_save, post_delete], sender=Station)
+@receiver([post_save, post_delete], sender=Route)
+@receiver([post_save, post_delete], sender=Crew)
+def invalidate_cached_responses(sender, **kwargs):
+    invalidate_responses(sender)
+
+
+@receiver(post_save, sender=Ticket)
+def count_saved_ticket(sender, instance, created, **kwargs):
+    trip = Trip.objects.filter(id=instance.trip_id)
+    if created:
+        trip.update(
+            tickets_sold=F("tickets_sold") + 1, version=F("version") + 1
+        )
+    else:
+        trip.bump_version()
+
+
+@receiver(post_delete, sender=Ticket)
+def count_deleted_ticket(sender, instance, **kwargs):
+    # Orders gate sales on tickets_sold, so keep it exact.
+    Trip.objects.filter(id=instance.trip_id, tickets_sold__gt=0).update(
+        tickets_sold=F("tickets_sold") - 1, version=F("version") + 1
+    )
+
+
+@receiver(m2m_changed, sender=Trip.crews.through)
+def bump_crew_trip_versions(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    if not reverse:
+        trips = Trip.objects.filter(id=instance.id)
+    elif pk_set is not None:
+        trips = Trip.objects.filter(id__in=pk_set)
+    else:
+        trips = Trip.objects.filter(crews=instance)
+    trips.bump_version()
+
+
+TRIP_LOOKUPS = {
+    TrainType: "train__train_type",
+    Train: "train",
+    Route: "route",
+    Crew: "crews",
+}
+
+
+@receiver([post_save, pre_delete], sender=TrainType)
+@receiver([post_save, pre_delete], sender=Train)
+@receiver([post_save, pre_delete], sender=Route)
+@receiver([post_save, pre_delete], sender=Crew)
+def bump_related_trip_versions(sender, instance, created=False, **kwargs):
+    if not created:
+        Trip.objects.filter(
+            **{TRIP_LOOKUPS[sender]: instance}
+        ).bump_version()
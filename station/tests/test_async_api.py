@@ -0,0 +1,148 @@
+import json
+from unittest.mock import patch
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, AsyncClient
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from station.models import Order, Ticket
+from station.views import TripPagination
+from station.tests.test_trip_api import sample_trip, sample_crew
+
+ASYNC_TRIP_URL = reverse("station:async-trip-list")
+ASYNC_STATION_URL = reverse("station:async-station-list")
+TRIP_URL = reverse("station:trip-list")
+STATION_URL = reverse("station:station-list")
+
+
+def async_detail_url(trip_id):
+    return reverse("station:async-trip-detail", args=[trip_id])
+
+
+def detail_url(trip_id):
+    return reverse("station:trip-detail", args=[trip_id])
+
+
+class AsyncReadApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@gmail.com",
+            password="password123",
+        )
+        self.token = str(AccessToken.for_user(self.user))
+        self.async_client = AsyncClient()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.trip = sample_trip()
+        self.trip.crews.add(sample_crew())
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(trip=self.trip, order=order, cargo=1, seat=3)
+        sample_trip()
+
+    def async_get(self, url, data=None, headers=None):
+        headers = {"Authorization": f"Bearer {self.token}", **(headers or {})}
+
+        return self.async_client.get(url, data, headers=headers)
+
+    async def test_auth_required(self):
+        res = await AsyncClient().get(ASYNC_TRIP_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_list_trips_matches_sync(self):
+        res = await self.async_get(ASYNC_TRIP_URL, {"source": "st"})
+        expected = await sync_to_async(self.client.get)(
+            TRIP_URL, {"source": "st"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), json.loads(expected.content))
+        self.assertEqual(len(res.json()["results"]), 2)
+
+    @patch.object(TripPagination, "page_size", 1)
+    async def test_trip_cursor_pages_match_sync(self):
+        def query(link):
+            return link and urlsplit(link).query
+
+        query_string = ""
+        for link in ("next", "previous"):
+            res = (await self.async_get(
+                f"{ASYNC_TRIP_URL}?{query_string}"
+            )).json()
+            expected = json.loads((await sync_to_async(self.client.get)(
+                f"{TRIP_URL}?{query_string}"
+            )).content)
+
+            self.assertEqual(res["results"], expected["results"])
+            self.assertEqual(len(res["results"]), 1)
+            for name in ("next", "previous"):
+                self.assertEqual(query(res[name]), query(expected[name]))
+            query_string = query(res[link])
+
+    async def test_retrieve_trip_matches_sync(self):
+        res = await self.async_get(async_detail_url(self.trip.id))
+        expected = await sync_to_async(self.client.get)(
+            detail_url(self.trip.id)
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), json.loads(expected.content))
+        self.assertEqual(res.json()["taken_seats"], [{"cargo": 1, "seat": 3}])
+
+    async def test_retrieve_seat_map_matches_sync(self):
+        for encoding in ("bitmap", "ranges"):
+            res = await self.async_get(
+                async_detail_url(self.trip.id), {"seats": encoding}
+            )
+            expected = await sync_to_async(self.client.get)(
+                detail_url(self.trip.id), {"seats": encoding}
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.json(), json.loads(expected.content))
+            self.assertEqual(res["ETag"], expected["ETag"])
+
+    async def test_retrieve_invalid_seat_map(self):
+        res = await self.async_get(
+            async_detail_url(self.trip.id), {"seats": "grid"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("seats", res.json())
+
+    async def test_retrieve_not_modified(self):
+        res = await self.async_get(async_detail_url(self.trip.id))
+
+        res = await self.async_get(
+            async_detail_url(self.trip.id),
+            headers={"If-None-Match": res["ETag"]},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+
+    async def test_retrieve_missing_trip(self):
+        res = await self.async_get(async_detail_url(0))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_list_stations_matches_sync(self):
+        res = await self.async_get(ASYNC_STATION_URL)
+        expected = await sync_to_async(self.client.get)(STATION_URL)
+
+        self.assertEqual(res.json(), json.loads(expected.content))
+
+    async def test_invalid_filter(self):
+        res = await self.async_get(
+            ASYNC_TRIP_URL, {"departure_time": "tomorrow"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,309 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from station.checks import check_shared_cache
+from station.models import (
+    IdempotencyKey,
+    Order,
+    QueuedOrder,
+    SeatHold,
+    Station,
+    Ticket,
+    Trip,
+)
+from station.search import station_names
+from station.tests.test_order_api import sample_trip
+
+
+class RebuildTripCountersTests(TestCase):
+    def setUp(self):
+        self.trip = sample_trip()
+        order = Order.objects.create(
+            user=get_user_model().objects.create_user(
+                email="user@gmail.com",
+                password="password123",
+            )
+        )
+        Ticket.objects.create(trip=self.trip, order=order, cargo=1, seat=1)
+        Ticket.objects.create(trip=self.trip, order=order, cargo=1, seat=2)
+        Trip.objects.filter(id=self.trip.id).update(tickets_sold=0)
+
+    def test_check_reports_stale_counters(self):
+        with self.assertRaises(CommandError):
+            call_command("rebuild_trip_counters", check=True, stdout=StringIO())
+
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.tickets_sold, 0)
+
+    def test_rebuild_fixes_stale_counters(self):
+        call_command("rebuild_trip_counters", stdout=StringIO())
+
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.tickets_sold, 2)
+        call_command("rebuild_trip_counters", check=True, stdout=StringIO())
+
+
+class ReapSeatHoldsTests(TestCase):
+    def test_reap_expired_holds(self):
+        trip = sample_trip()
+        user = get_user_model().objects.create_user(
+            email="user@gmail.com",
+            password="password123",
+        )
+        now = datetime.now()
+        for seat, expires_at in (
+            (1, now - timedelta(minutes=1)),
+            (2, now - timedelta(seconds=1)),
+            (3, now + timedelta(minutes=5)),
+        ):
+            SeatHold.objects.create(
+                trip=trip, user=user, cargo=1, seat=seat, expires_at=expires_at
+            )
+
+        output = StringIO()
+        call_command("reap_seat_holds", batch_size=1, stdout=output)
+
+        self.assertIn("Reaped 2 expired seat hold(s)", output.getvalue())
+        self.assertEqual(
+            list(SeatHold.objects.values_list("seat", flat=True)), [3]
+        )
+        trip.refresh_from_db()
+        self.assertEqual(trip.version, 3)
+
+
+class ReapIdempotencyKeysTests(TestCase):
+    def test_reap_expired_keys(self):
+        user = get_user_model().objects.create_user(
+            email="user@gmail.com",
+            password="password123",
+        )
+        now = datetime.now()
+        for key, expires_at in (
+            ("old", now - timedelta(hours=1)),
+            ("older", now - timedelta(days=1)),
+            ("fresh", now + timedelta(hours=1)),
+        ):
+            IdempotencyKey.objects.create(
+                user=user, key=key, fingerprint="", expires_at=expires_at
+            )
+
+        output = StringIO()
+        call_command("reap_idempotency_keys", batch_size=1, stdout=output)
+
+        self.assertIn(
+            "Reaped 2 expired idempotency key(s)", output.getvalue()
+        )
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)),
+            ["fresh"]
+        )
+
+
+class StressOrdersTests(TestCase):
+    def test_stress_orders(self):
+        output = StringIO()
+        call_command(
+            "stress_orders",
+            processes=1,
+            duration=0.5,
+            trips=2,
+            cargos=1,
+            places=5,
+            stdout=output,
+        )
+
+        self.assertIn("10 seats sold, 0 double booking(s)", output.getvalue())
+        self.assertIn("No seat was sold twice", output.getvalue())
+        self.assertFalse(Trip.objects.exists())
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_stress_orders_allocate(self):
+        output = StringIO()
+        call_command(
+            "stress_orders",
+            processes=1,
+            duration=0.5,
+            trips=2,
+            cargos=1,
+            places=5,
+            allocate=True,
+            stdout=output,
+        )
+
+        self.assertIn("0 double booking(s)", output.getvalue())
+        self.assertIn("No seat was sold twice", output.getvalue())
+
+    def test_stress_orders_queued(self):
+        output = StringIO()
+        call_command(
+            "stress_orders",
+            processes=1,
+            queue_workers=1,
+            duration=0.5,
+            trips=2,
+            cargos=1,
+            places=5,
+            stdout=output,
+        )
+
+        self.assertIn("queued/s", output.getvalue())
+        self.assertIn("10 seats sold, 0 double booking(s)", output.getvalue())
+        self.assertFalse(QueuedOrder.objects.exists())
+
+
+@patch("station.management.commands.wait_for_db.time.sleep")
+class WaitForDbTests(SimpleTestCase):
+    def wait_for_db(self, connection, **options):
+        output = StringIO()
+        with patch(
+            "station.management.commands.wait_for_db.connections",
+            {"default": connection},
+        ):
+            call_command("wait_for_db", stdout=output, **options)
+        return output.getvalue()
+
+    def test_runs_select_1(self, sleep):
+        connection = MagicMock()
+
+        output = self.wait_for_db(connection)
+
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.execute.assert_called_once_with("SELECT 1")
+        sleep.assert_not_called()
+        self.assertIn("Database available! Connected in", output)
+
+    def test_retries_with_exponential_backoff(self, sleep):
+        connection = MagicMock()
+        connection.ensure_connection.side_effect = [
+            OperationalError, OperationalError, OperationalError, None
+        ]
+
+        self.wait_for_db(connection, interval=1)
+
+        self.assertEqual(
+            [call.args[0] for call in sleep.call_args_list], [1, 2, 4]
+        )
+        self.assertEqual(connection.close.call_count, 3)
+
+    def test_gives_up_after_timeout(self, sleep):
+        connection = MagicMock()
+        connection.ensure_connection.side_effect = OperationalError
+
+        with self.assertRaises(CommandError):
+            self.wait_for_db(connection, timeout=0)
+
+        sleep.assert_not_called()
+
+
+class ImportTimetableTests(TestCase):
+    def import_timetable(self, kind, content, suffix=".csv", **options):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=suffix, delete=False, encoding="utf-8"
+        ) as stream:
+            stream.write(content)
+        self.addCleanup(os.remove, stream.name)
+
+        output = StringIO()
+        call_command(
+            "import_timetable",
+            kind,
+            stream.name,
+            batch_size=2,
+            stdout=output,
+            stderr=output,
+            **options
+        )
+        return output.getvalue()
+
+    def test_import_timetable(self):
+        self.import_timetable(
+            "stations",
+            "name,latitude,longitude\n"
+            "Kyiv,50.44,30.49\n"
+            "Lviv,49.84,24.03\n"
+            "Odesa,,\n"
+        )
+        self.import_timetable(
+            "routes",
+            '{"source": "Kyiv", "destination": "Lviv", "distance": 540}\n'
+            '{"source": "Lviv", "destination": "Odesa", "distance": 790}\n',
+            suffix=".ndjson"
+        )
+        train = sample_trip().train
+        output = self.import_timetable(
+            "trips",
+            "source,destination,train,departure_time,arrival_time\n"
+            f"Kyiv,Lviv,{train.name},2022-06-02T08:00,2022-06-02T14:00\n"
+            f"Kyiv,Lviv,{train.name},2022-06-03T08:00,2022-06-03T14:00\n"
+            f"Lviv,Odesa,{train.name},2022-06-03T16:00,2022-06-04T06:00\n"
+        )
+
+        self.assertIn("Imported 3 trips", output)
+        self.assertIsNone(Station.objects.get(name="Odesa").latitude)
+        self.assertEqual(
+            Trip.objects.filter(
+                route__source__name="Kyiv", route__destination__name="Lviv"
+            ).count(),
+            2
+        )
+
+    def test_import_timetable_invalid_row(self):
+        with self.assertRaises(CommandError):
+            self.import_timetable(
+                "routes",
+                "source,destination,distance\nKyiv,Lviv,540\n"
+            )
+
+        output = self.import_timetable(
+            "stations",
+            "name,latitude,longitude\nKyiv,north,30.49\nLviv,49.84,24.03\n",
+            skip_invalid=True
+        )
+
+        self.assertIn("1 skipped", output)
+        self.assertEqual(
+            list(Station.objects.values_list("name", flat=True)), ["Lviv"]
+        )
+
+    def test_failed_import_invalidates_committed_batches(self):
+        with patch.object(station_names, "invalidate") as invalidate:
+            with self.assertRaises(CommandError):
+                self.import_timetable(
+                    "stations",
+                    "name,latitude,longitude\n"
+                    "Kyiv,50.44,30.49\nLviv,49.84,24.03\nOdesa,south,\n"
+                )
+
+        invalidate.assert_called_once()
+        self.assertEqual(Station.objects.count(), 2)
+
+    def test_import_warns_about_process_local_cache(self):
+        output = self.import_timetable(
+            "stations", "name,latitude,longitude\nKyiv,50.44,30.49\n"
+        )
+
+        self.assertIn("The shared cache is local to this process", output)
+        self.assertEqual(
+            [warning.id for warning in check_shared_cache(None)],
+            ["station.W001"]
+        )
+
+    @override_settings(CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+        "shared": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "shared_cache",
+        },
+    })
+    def test_shared_cache_passes_check(self):
+        self.assertEqual(check_shared_cache(None), [])
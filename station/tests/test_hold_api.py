@@ -0,0 +1,306 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from station.models import Order, SeatHold, Ticket, Trip
+from station.tests.test_order_api import sample_trip, order_payload
+
+HOLD_URL = reverse("station:seathold-list")
+ORDER_URL = reverse("station:order-list")
+TRIP_URL = reverse("station:trip-list")
+
+
+def hold_payload(trip, seats):
+    return order_payload(trip, seats)["tickets"]
+
+
+def trip_detail_url(trip_id):
+    return reverse("station:trip-detail", args=[trip_id])
+
+
+def hold_detail_url(hold_id):
+    return reverse("station:seathold-detail", args=[hold_id])
+
+
+def expire_holds():
+    SeatHold.objects.update(expires_at=datetime.now() - timedelta(seconds=1))
+
+
+class UnauthenticatedSeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.post(HOLD_URL, [], format="json")
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedSeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@gmail.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+        self.other_client = APIClient()
+        self.other_client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="other@gmail.com",
+                password="password123",
+            )
+        )
+        self.trip = sample_trip()
+        cache.clear()
+
+    def hold(self, seats, client=None):
+        return (client or self.client).post(
+            HOLD_URL, hold_payload(self.trip, seats), format="json"
+        )
+
+    def test_hold_seats(self):
+        res = self.hold([(1, 1), (2, 5)])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 2)
+        self.assertEqual(
+            [(hold["cargo"], hold["seat"]) for hold in res.data],
+            [(1, 1), (2, 5)]
+        )
+        self.assertIn("expires_at", res.data[0])
+        self.assertEqual(SeatHold.objects.filter(user=self.user).count(), 2)
+
+    def test_hold_expires_by_database_clock(self):
+        before = datetime.now()
+        res = self.hold([(1, 1)])
+
+        expires_at = SeatHold.objects.get().expires_at
+        self.assertGreaterEqual(
+            expires_at, before + timedelta(seconds=599)
+        )
+        self.assertLessEqual(
+            expires_at, datetime.now() + timedelta(seconds=601)
+        )
+        self.assertEqual(
+            res.data[0]["expires_at"], expires_at.isoformat()
+        )
+
+    def test_hold_no_seats(self):
+        res = self.client.post(HOLD_URL, [], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SeatHold.objects.exists())
+
+    @override_settings(MAX_ACTIVE_HOLDS=3)
+    def test_hold_more_than_max_active_holds(self):
+        self.hold([(1, 1), (1, 2)])
+
+        res = self.hold([(1, 3), (1, 4)])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data, ["At most 3 seats can be held at once, 2 already are"]
+        )
+        self.assertEqual(SeatHold.objects.count(), 2)
+
+    @override_settings(MAX_ACTIVE_HOLDS=3)
+    def test_expired_holds_do_not_count_towards_max(self):
+        self.hold([(1, 1), (1, 2)])
+        expire_holds()
+
+        res = self.hold([(1, 3), (1, 4)])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_held_seats_are_taken(self):
+        self.hold([(1, 1), (2, 5)])
+
+        detail = self.client.get(trip_detail_url(self.trip.id))
+        trips = self.client.get(TRIP_URL)
+
+        self.assertEqual(
+            detail.data["taken_seats"],
+            [{"cargo": 1, "seat": 1}, {"cargo": 2, "seat": 5}]
+        )
+        self.assertEqual(trips.data["results"][0]["tickets_available"], 18)
+
+    def test_expired_holds_are_free(self):
+        self.hold([(1, 1)])
+        expire_holds()
+
+        detail = self.client.get(trip_detail_url(self.trip.id))
+        trips = self.client.get(TRIP_URL)
+        res = self.hold([(1, 1)], self.other_client)
+
+        self.assertEqual(detail.data["taken_seats"], [])
+        self.assertEqual(trips.data["results"][0]["tickets_available"], 20)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.count(), 1)
+
+    def test_hold_expiry_changes_trip_etag(self):
+        self.hold([(1, 1)])
+        etag = self.client.get(trip_detail_url(self.trip.id))["ETag"]
+
+        expire_holds()
+        res = self.client.get(
+            trip_detail_url(self.trip.id), HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["taken_seats"], [])
+
+    def test_hold_seat_held_by_another_customer(self):
+        self.hold([(1, 1)], self.other_client)
+
+        res = self.hold([(1, 2), (1, 1)])
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["tickets"],
+            [
+                f"Seat 1 in cargo 1 of trip {self.trip.id} "
+                f"is held by another customer"
+            ]
+        )
+        self.assertFalse(SeatHold.objects.filter(user=self.user).exists())
+
+    def test_hold_sold_seat(self):
+        self.client.post(
+            ORDER_URL, order_payload(self.trip, [(1, 1)]), format="json"
+        )
+
+        res = self.hold([(1, 1)])
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["tickets"],
+            [f"Seat 1 in cargo 1 of trip {self.trip.id} is already taken"]
+        )
+
+    def test_hold_invalid_seat(self):
+        res = self.hold([(1, 11)])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_hold_duplicate_seats(self):
+        res = self.hold([(1, 1), (1, 1)])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_list_own_active_holds(self):
+        self.hold([(1, 1)])
+        self.hold([(1, 2)], self.other_client)
+
+        res = self.client.get(HOLD_URL)
+
+        self.assertEqual([hold["seat"] for hold in res.data], [1])
+
+    def test_release_hold(self):
+        hold_id = self.hold([(1, 1)]).data[0]["id"]
+
+        res = self.client.delete(hold_detail_url(hold_id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            self.hold([(1, 1)], self.other_client).status_code,
+            status.HTTP_201_CREATED
+        )
+
+    def test_order_from_holds(self):
+        holds = self.hold([(1, 1), (2, 5)]).data
+
+        res = self.client.post(
+            ORDER_URL,
+            {"holds": [hold["id"] for hold in holds]},
+            format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [(ticket["cargo"], ticket["seat"]) for ticket in res.data["tickets"]],
+            [(1, 1), (2, 5)]
+        )
+        self.assertFalse(SeatHold.objects.exists())
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.tickets_sold, 2)
+        trips = self.client.get(TRIP_URL)
+        self.assertEqual(trips.data["results"][0]["tickets_available"], 18)
+
+    def test_order_from_holds_and_tickets(self):
+        hold_id = self.hold([(1, 1)]).data[0]["id"]
+
+        res = self.client.post(
+            ORDER_URL,
+            {**order_payload(self.trip, [(1, 2)]), "holds": [hold_id]},
+            format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ticket.objects.count(), 2)
+
+    def test_order_from_expired_hold(self):
+        hold_id = self.hold([(1, 1)]).data[0]["id"]
+        expire_holds()
+
+        res = self.client.post(ORDER_URL, {"holds": [hold_id]}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["holds"],
+            [f"Hold {hold_id} does not exist or has expired"]
+        )
+        self.assertFalse(Order.objects.exists())
+
+    def test_order_from_another_customers_hold(self):
+        hold_id = self.hold([(1, 1)], self.other_client).data[0]["id"]
+
+        res = self.client.post(ORDER_URL, {"holds": [hold_id]}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_order_seat_held_by_another_customer(self):
+        self.hold([(1, 1)], self.other_client)
+
+        res = self.client.post(
+            ORDER_URL, order_payload(self.trip, [(1, 1)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["tickets"],
+            [
+                f"Seat 1 in cargo 1 of trip {self.trip.id} "
+                f"is held by another customer"
+            ]
+        )
+        self.assertFalse(Order.objects.exists())
+
+    def test_order_own_held_seat_releases_hold(self):
+        self.hold([(1, 1)])
+
+        res = self.client.post(
+            ORDER_URL, order_payload(self.trip, [(1, 1)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_order_without_tickets_or_holds(self):
+        res = self.client.post(ORDER_URL, {}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("tickets", res.data)
+
+    def test_hold_bumps_trip_version(self):
+        self.hold([(1, 1)])
+
+        self.assertEqual(Trip.objects.get(id=self.trip.id).version, 2)
@@ -0,0 +1,157 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from station.geo import haversine
+from station.journeys import RouteGraph
+from station.models import Station, Route
+
+JOURNEY_URL = reverse("station:journey-list")
+
+
+def sample_station(**params):
+    defaults = {
+        "name": "Station",
+        "latitude": 50.0,
+        "longitude": 30.0
+    }
+    defaults.update(params)
+
+    return Station.objects.create(**defaults)
+
+
+class UnauthenticatedJourneyApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(JOURNEY_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedJourneyApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@gmail.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+        cache.clear()
+
+        self.kyiv = sample_station(
+            name="Kyiv", latitude=50.44, longitude=30.49
+        )
+        self.vinnytsia = sample_station(
+            name="Vinnytsia", latitude=49.23, longitude=28.47
+        )
+        self.lviv = sample_station(
+            name="Lviv", latitude=49.84, longitude=24.0
+        )
+        Route.objects.create(
+            source=self.kyiv, destination=self.vinnytsia, distance=220
+        )
+        Route.objects.create(
+            source=self.vinnytsia, destination=self.lviv, distance=360
+        )
+        self.direct = Route.objects.create(
+            source=self.kyiv, destination=self.lviv, distance=700
+        )
+
+    def get_journey(self, source, destination):
+        return self.client.get(
+            JOURNEY_URL, {"from": source.id, "to": destination.id}
+        )
+
+    def test_shortest_journey(self):
+        res = self.get_journey(self.kyiv, self.lviv)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["distance"], 580)
+        self.assertEqual(
+            [station["name"] for station in res.data["stations"]],
+            ["Kyiv", "Vinnytsia", "Lviv"]
+        )
+        self.assertEqual(len(res.data["routes"]), 2)
+
+    def test_journey_uses_created_route(self):
+        self.get_journey(self.kyiv, self.lviv)
+
+        route = Route.objects.create(
+            source=self.kyiv, destination=self.lviv, distance=540
+        )
+        res = self.get_journey(self.kyiv, self.lviv)
+
+        self.assertEqual(res.data["routes"], [route.id])
+
+    def test_journey_uses_updated_route(self):
+        self.get_journey(self.kyiv, self.lviv)
+
+        self.direct.distance = 500
+        self.direct.save()
+        res = self.get_journey(self.kyiv, self.lviv)
+
+        self.assertEqual(res.data["routes"], [self.direct.id])
+
+    def test_journey_not_found(self):
+        res = self.get_journey(self.lviv, self.kyiv)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_journey_from_unknown_station(self):
+        res = self.client.get(JOURNEY_URL, {"from": 999, "to": 999})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_journey_from_station_without_routes(self):
+        station = sample_station(name="Odesa")
+
+        res = self.get_journey(station, station)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_journey_requires_stations(self):
+        res = self.client.get(JOURNEY_URL, {"from": self.kyiv.id})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RouteGraphTests(TestCase):
+    def test_heuristic_with_route_shorter_than_straight_line(self):
+        graph = RouteGraph()
+        graph.add_station(1, "A", 50.0, 30.0)
+        graph.add_station(2, "B", 50.0, 31.0)
+        graph.add_station(3, "C", 50.0, 32.0)
+        graph.add_route(1, 1, 2, 10)
+        graph.add_route(2, 2, 3, 10)
+        graph.add_route(3, 1, 3, 100)
+
+        journey = graph.shortest_path(1, 3)
+
+        self.assertEqual(journey.distance, 20)
+        self.assertEqual(journey.stations, [1, 2, 3])
+
+    def test_station_without_coordinates_keeps_path_optimal(self):
+        graph = RouteGraph()
+        graph.add_station(1, "A", 50.0, 30.0)
+        graph.add_station(2, "C", 50.0, 30.05)
+        graph.add_station(3, "X", None, None)
+        graph.add_station(4, "T", 50.0, 44.0)
+        # Only just longer than the straight line, so A* with the
+        # great-circle heuristic would settle T before C.
+        direct = int(haversine(50.0, 30.0, 50.0, 44.0)) + 2
+        self.assertLess(direct, 10 + haversine(50.0, 30.05, 50.0, 44.0))
+        graph.add_route(1, 1, 4, direct)
+        graph.add_route(2, 1, 2, 10)
+        graph.add_route(3, 2, 3, 10)
+        graph.add_route(4, 3, 4, 10)
+
+        journey = graph.shortest_path(1, 4)
+
+        self.assertEqual(graph.heuristic_scale, 0)
+        self.assertEqual(journey.distance, 30)
+        self.assertEqual(journey.stations, [1, 2, 3, 4])
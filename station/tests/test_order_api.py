@@ -0,0 +1,605 @@
+import csv
+import json
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from station.allocation import index_key
+from station.models import (
+    IdempotencyKey,
+    Station,
+    Route,
+    TrainType,
+    Train,
+    Trip,
+    Order,
+)
+from station.shared_cache import shared_cache
+
+ORDER_URL = reverse("station:order-list")
+EXPORT_URL = reverse("station:order-export")
+TRIP_URL = reverse("station:trip-list")
+
+
+def sample_station(**params):
+    defaults = {
+        "name": "Station",
+        "latitude": 38.0753009,
+        "longitude": 43.5792084
+    }
+    defaults.update(params)
+
+    return Station.objects.create(**defaults)
+
+
+def sample_trip(**params):
+    train_type = TrainType.objects.create(name="Train Type")
+    defaults = {
+        "train": Train.objects.create(
+            name="Train",
+            train_type=train_type,
+            cargo_num=2,
+            places_in_cargo=10
+        ),
+        "route": Route.objects.create(
+            source=sample_station(),
+            destination=sample_station(),
+            distance=100
+        ),
+        "departure_time": datetime(2022, 6, 2, 14, 0),
+        "arrival_time": datetime(2022, 6, 2, 16, 0)
+    }
+    defaults.update(params)
+
+    return Trip.objects.create(**defaults)
+
+
+def order_payload(trip, seats):
+    return {
+        "tickets": [
+            {"trip": trip.id, "cargo": cargo, "seat": seat}
+            for cargo, seat in seats
+        ]
+    }
+
+
+class UnauthenticatedOrderApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(ORDER_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ExportOrderApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@gmail.com",
+            password="password123",
+        )
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@gmail.com",
+            password="admin"
+        )
+        cache.clear()
+
+        self.trip = sample_trip()
+        self.client.force_authenticate(self.user)
+        self.client.post(
+            ORDER_URL,
+            order_payload(self.trip, [(1, 1), (2, 5)]),
+            format="json"
+        )
+
+    def test_export_forbidden(self):
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_csv(self):
+        self.client.force_authenticate(self.admin)
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        rows = list(csv.DictReader(
+            b"".join(res.streaming_content).decode().splitlines()
+        ))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]["user"], "user@gmail.com")
+        self.assertEqual(rows[1]["train"], "Train")
+        self.assertEqual(rows[1]["departure_time"], "2022-06-02T14:00:00")
+        self.assertEqual((rows[1]["cargo"], rows[1]["seat"]), ("2", "5"))
+
+    def test_export_ndjson(self):
+        self.client.force_authenticate(self.admin)
+
+        res = self.client.get(EXPORT_URL, {"output": "ndjson"})
+
+        rows = [
+            json.loads(line)
+            for line in b"".join(res.streaming_content).splitlines()
+        ]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["trip_id"], self.trip.id)
+        self.assertEqual(rows[0]["source"], "Station")
+        self.assertEqual(rows[0]["departure_time"], "2022-06-02T14:00:00")
+
+
+class AuthenticatedOrderApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@gmail.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+        cache.clear()
+
+    def test_create_order_updates_tickets_sold(self):
+        trip = sample_trip()
+
+        res = self.client.post(
+            ORDER_URL,
+            order_payload(trip, [(1, 1), (1, 2), (2, 1)]),
+            format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        trip.refresh_from_db()
+        self.assertEqual(trip.tickets_sold, 3)
+        self.assertEqual(trip.version, 2)
+
+        res = self.client.get(TRIP_URL)
+        self.assertEqual(res.data["results"][0]["tickets_available"], 17)
+
+    def test_failed_order_does_not_update_tickets_sold(self):
+        trip = sample_trip()
+
+        res = self.client.post(
+            ORDER_URL,
+            order_payload(trip, [(1, 1), (3, 1)]),
+            format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        trip.refresh_from_db()
+        self.assertEqual(trip.tickets_sold, 0)
+        self.assertEqual(trip.version, 1)
+        self.assertFalse(Order.objects.exists())
+
+    def test_create_order_with_taken_seat(self):
+        trip = sample_trip()
+        self.client.post(
+            ORDER_URL, order_payload(trip, [(1, 1)]), format="json"
+        )
+
+        res = self.client.post(
+            ORDER_URL,
+            order_payload(trip, [(1, 1), (1, 2)]),
+            format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["tickets"],
+            [f"Seat 1 in cargo 1 of trip {trip.id} is already taken"]
+        )
+        trip.refresh_from_db()
+        self.assertEqual(trip.tickets_sold, 1)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_create_order_on_sold_out_trip(self):
+        trip = sample_trip()
+        Trip.objects.filter(id=trip.id).update(tickets_sold=20)
+
+        res = self.client.post(
+            ORDER_URL, order_payload(trip, [(1, 1)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["tickets"],
+            [
+                f"Seat 1 in cargo 1 of trip {trip.id} "
+                f"is not available, the trip is sold out"
+            ]
+        )
+        self.assertFalse(Order.objects.exists())
+
+    def test_deleted_order_frees_tickets_sold(self):
+        trip = sample_trip()
+        self.client.post(
+            ORDER_URL, order_payload(trip, [(1, 1), (1, 2)]), format="json"
+        )
+
+        Order.objects.get().delete()
+
+        trip.refresh_from_db()
+        self.assertEqual(trip.tickets_sold, 0)
+
+    def test_create_order_with_duplicate_seats(self):
+        trip = sample_trip()
+
+        res = self.client.post(
+            ORDER_URL,
+            order_payload(trip, [(1, 1), (1, 1)]),
+            format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_create_order_query_count_does_not_grow_with_tickets(self):
+        trip = sample_trip()
+
+        with CaptureQueriesContext(connection) as single:
+            self.client.post(
+                ORDER_URL, order_payload(trip, [(1, 1)]), format="json"
+            )
+        with CaptureQueriesContext(connection) as group:
+            res = self.client.post(
+                ORDER_URL,
+                order_payload(trip, [(2, seat) for seat in range(1, 7)]),
+                format="json"
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(single), len(group))
+
+    def test_list_orders_query_count(self):
+        trip = sample_trip()
+        self.client.post(
+            ORDER_URL, order_payload(trip, [(1, 1)]), format="json"
+        )
+
+        with self.assertNumQueries(3):
+            res = self.client.get(ORDER_URL)
+        self.assertEqual(len(res.data["results"]), 1)
+
+        for number in range(1, 4):
+            other_trip = sample_trip()
+            self.client.post(
+                ORDER_URL,
+                {
+                    "tickets": [
+                        {"trip": trip.id, "cargo": 2, "seat": number},
+                        {"trip": other_trip.id, "cargo": 1, "seat": 1},
+                        {"trip": other_trip.id, "cargo": 1, "seat": 2},
+                    ]
+                },
+                format="json"
+            )
+
+        with self.assertNumQueries(3):
+            res = self.client.get(ORDER_URL)
+        self.assertEqual(len(res.data["results"]), 4)
+        self.assertEqual(
+            res.data["results"][0]["tickets"][1]["trip"]["tickets_available"],
+            18
+        )
+
+    def test_list_orders_cursor_pagination(self):
+        trip = sample_trip()
+        for number in range(12):
+            self.client.post(
+                ORDER_URL,
+                order_payload(trip, [(number % 2 + 1, number // 2 + 1)]),
+                format="json"
+            )
+
+        first = self.client.get(ORDER_URL)
+        second = self.client.get(first.data["next"])
+
+        self.assertNotIn("count", first.data)
+        self.assertEqual(len(first.data["results"]), 10)
+        self.assertEqual(len(second.data["results"]), 2)
+        self.assertIsNone(second.data["next"])
+        ids = [
+            order["id"]
+            for order in first.data["results"] + second.data["results"]
+        ]
+        self.assertEqual(
+            ids,
+            list(Order.objects.order_by("-created_at", "-id")
+                 .values_list("id", flat=True))
+        )
+
+    def test_list_orders_page_number_pagination(self):
+        trip = sample_trip()
+        for number in range(12):
+            self.client.post(
+                ORDER_URL,
+                order_payload(trip, [(number % 2 + 1, number // 2 + 1)]),
+                format="json"
+            )
+
+        res = self.client.get(ORDER_URL, {"page": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 12)
+        self.assertEqual(len(res.data["results"]), 2)
+
+
+class SeatAllocationApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@gmail.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+        self.trip = sample_trip()
+        cache.clear()
+
+    def book(self, seats):
+        return self.client.post(
+            ORDER_URL, order_payload(self.trip, seats), format="json"
+        )
+
+    def allocate(self, count, trip=None):
+        return self.client.post(
+            ORDER_URL,
+            {"passengers": [{"trip": (trip or self.trip).id, "count": count}]},
+            format="json"
+        )
+
+    @staticmethod
+    def seats(res):
+        return [
+            (ticket["cargo"], ticket["seat"])
+            for ticket in res.data["tickets"]
+        ]
+
+    def test_allocate_adjacent_seats(self):
+        res = self.allocate(3)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.seats(res), [(1, 1), (1, 2), (1, 3)])
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.tickets_sold, 3)
+        self.assertEqual(self.trip.version, 2)
+
+    def test_allocate_group_into_shortest_fitting_run(self):
+        self.book([(1, 2), (1, 5)])
+
+        small = self.allocate(2)
+        large = self.allocate(6)
+
+        self.assertEqual(self.seats(small), [(1, 3), (1, 4)])
+        self.assertEqual(
+            self.seats(large), [(2, seat) for seat in range(1, 7)]
+        )
+
+    def test_allocate_splits_group_without_long_enough_run(self):
+        self.book([(cargo, seat) for cargo in (1, 2) for seat in (4, 8)])
+
+        res = self.allocate(5)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            self.seats(res), [(1, 1), (1, 2), (1, 3), (1, 5), (1, 6)]
+        )
+
+    def test_allocate_skips_held_seats(self):
+        other_client = APIClient()
+        other_client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="other@gmail.com",
+                password="password123",
+            )
+        )
+        other_client.post(
+            reverse("station:seathold-list"),
+            order_payload(self.trip, [(1, 1)])["tickets"],
+            format="json"
+        )
+
+        res = self.allocate(2)
+
+        self.assertEqual(self.seats(res), [(1, 2), (1, 3)])
+
+    def test_allocate_more_than_free_seats(self):
+        self.book([(1, seat) for seat in range(1, 11)])
+
+        res = self.allocate(11)
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["passengers"],
+            [f"Trip {self.trip.id} has fewer than 11 free seats"]
+        )
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_allocate_reuses_index_of_previous_allocation(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.allocate(2)
+
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(shared_cache().get(index_key(self.trip.id, 2)))
+        res = self.allocate(2)
+
+        self.assertEqual(self.seats(res), [(1, 3), (1, 4)])
+
+    def test_stale_index_is_not_used_after_other_bookings(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.allocate(2)
+        self.book([(1, 3)])
+
+        res = self.allocate(2)
+
+        self.assertEqual(self.seats(res), [(1, 4), (1, 5)])
+
+    def test_chosen_seats_are_taken_out_of_cached_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.allocate(2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book([(1, 3), (1, 6)])
+
+        index = shared_cache().get(index_key(self.trip.id, 3))
+        self.assertIsNotNone(index)
+        self.assertEqual(index.free, 16)
+        res = self.allocate(2)
+
+        self.assertEqual(self.seats(res), [(1, 4), (1, 5)])
+
+    def test_held_seats_are_taken_out_of_cached_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.allocate(2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("station:seathold-list"),
+                order_payload(self.trip, [(1, 4)])["tickets"],
+                format="json"
+            )
+
+        self.assertIsNotNone(shared_cache().get(index_key(self.trip.id, 3)))
+        res = self.allocate(2)
+
+        self.assertEqual(self.seats(res), [(1, 5), (1, 6)])
+
+    def test_allocate_with_chosen_seats_on_other_trip(self):
+        other_trip = sample_trip()
+
+        res = self.client.post(
+            ORDER_URL,
+            {
+                **order_payload(other_trip, [(2, 10)]),
+                "passengers": [{"trip": self.trip.id, "count": 2}],
+            },
+            format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tickets"]), 3)
+
+    def test_allocate_with_chosen_seats_on_same_trip(self):
+        res = self.client.post(
+            ORDER_URL,
+            {
+                **order_payload(self.trip, [(1, 2)]),
+                "passengers": [{"trip": self.trip.id, "count": 2}],
+            },
+            format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        seats = [
+            (ticket["cargo"], ticket["seat"]) for ticket in res.data["tickets"]
+        ]
+        self.assertEqual(len(set(seats)), 3)
+        self.assertIn((1, 2), seats)
+
+    def test_allocate_invalid_count(self):
+        res = self.allocate(0)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+
+class IdempotentOrderApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@gmail.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+        self.trip = sample_trip()
+        cache.clear()
+
+    def order(self, seats, key="order-1", client=None):
+        return (client or self.client).post(
+            ORDER_URL,
+            order_payload(self.trip, seats),
+            format="json",
+            headers={"Idempotency-Key": key},
+        )
+
+    def test_retry_replays_first_response(self):
+        first = self.order([(1, 1)])
+
+        with self.assertNumQueries(3):
+            retry = self.order([(1, 1)])
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.tickets_sold, 1)
+
+    def test_retry_replays_conflict(self):
+        self.client.post(
+            ORDER_URL, order_payload(self.trip, [(1, 1)]), format="json"
+        )
+        self.order([(1, 1)])
+        Order.objects.all().delete()
+
+        retry = self.order([(1, 1)])
+
+        self.assertEqual(retry.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertFalse(Order.objects.exists())
+
+    def test_key_reused_for_another_request(self):
+        self.order([(1, 1)])
+
+        res = self.order([(1, 2)])
+
+        self.assertEqual(
+            res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_keys_are_per_user(self):
+        other_client = APIClient()
+        other_client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="other@gmail.com",
+                password="password123",
+            )
+        )
+        self.order([(1, 1)])
+
+        res = self.order([(1, 2)], client=other_client)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_expired_key_runs_again(self):
+        self.order([(1, 1)])
+        IdempotencyKey.objects.update(
+            expires_at=datetime.now() - timedelta(seconds=1)
+        )
+
+        res = self.order([(1, 2)])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("Idempotent-Replayed", res)
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_order_without_key_is_not_stored(self):
+        self.client.post(
+            ORDER_URL, order_payload(self.trip, [(1, 1)]), format="json"
+        )
+
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_invalid_key(self):
+        res = self.order([(1, 1)], key="k" * 256)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
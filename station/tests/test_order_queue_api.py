@@ -0,0 +1,231 @@
+from collections import Counter
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from station.allocation import index_key
+from station.models import Order, QueuedOrder, Ticket, Trip
+from station.order_queue import place_queued_orders, validate_queued
+from station.shared_cache import shared_cache
+from station.tests.test_hold_api import expire_holds, hold_payload
+from station.tests.test_order_api import sample_trip, order_payload
+
+ORDER_URL = reverse("station:order-list")
+HOLD_URL = reverse("station:seathold-list")
+
+
+def passengers_payload(trip, count):
+    return {"passengers": [{"trip": trip.id, "count": count}]}
+
+
+@override_settings(QUEUE_ORDERS=True)
+class QueuedOrderApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@gmail.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+        self.trip = sample_trip()
+        cache.clear()
+
+    def queue(self, payload):
+        return self.client.post(ORDER_URL, payload, format="json")
+
+    def status_of(self, res):
+        return self.client.get(res["Location"]).data
+
+    def test_order_is_queued(self):
+        res = self.queue(order_payload(self.trip, [(1, 1)]))
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data["status"], "pending")
+        self.assertIsNone(res.data["order"])
+        self.assertEqual(res["Location"], res.data["url"])
+        self.assertEqual(QueuedOrder.objects.count(), 1)
+        self.assertFalse(Order.objects.exists())
+
+    def test_invalid_order_is_not_queued(self):
+        res = self.queue(order_payload(self.trip, [(3, 1)]))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(QueuedOrder.objects.exists())
+
+    def test_worker_places_queued_orders(self):
+        first = self.queue(order_payload(self.trip, [(1, 1), (1, 2)]))
+        second = self.queue(order_payload(self.trip, [(2, 1)]))
+
+        output = StringIO()
+        call_command("process_order_queue", drain=True, stdout=output)
+
+        self.assertIn("Placed 2 queued order(s), 0 failed", output.getvalue())
+        placed = self.status_of(first)
+        self.assertEqual(placed["status"], "placed")
+        self.assertEqual(
+            [(ticket["cargo"], ticket["seat"])
+             for ticket in placed["order"]["tickets"]],
+            [(1, 1), (1, 2)]
+        )
+        self.assertEqual(self.status_of(second)["status"], "placed")
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.tickets_sold, 3)
+        self.assertEqual(self.trip.version, 2)
+
+    def test_conflicting_queued_order_fails(self):
+        self.queue(order_payload(self.trip, [(1, 1)]))
+        conflict = self.queue(order_payload(self.trip, [(1, 2), (1, 1)]))
+
+        outcomes = place_queued_orders(batch_size=10)
+
+        self.assertEqual(outcomes, {"placed": 1, "failed": 1})
+        failed = self.status_of(conflict)
+        self.assertEqual(failed["status"], "failed")
+        self.assertEqual(
+            failed["errors"]["tickets"],
+            [f"Seat 1 in cargo 1 of trip {self.trip.id} is already taken"]
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.tickets_sold, 1)
+
+    def test_queued_order_for_deleted_trip_fails_alone(self):
+        gone = sample_trip()
+        lost = self.queue(order_payload(gone, [(1, 1)]))
+        kept = self.queue(order_payload(self.trip, [(1, 1)]))
+
+        def validate_then_delete(batch):
+            valid = validate_queued(batch)
+            gone.delete()
+
+            return valid
+
+        with patch(
+            "station.order_queue.validate_queued",
+            side_effect=validate_then_delete,
+        ), self.assertLogs("station.order_queue", "ERROR"):
+            outcomes = place_queued_orders(batch_size=10)
+
+        self.assertEqual(outcomes, {"placed": 1, "failed": 1})
+        self.assertEqual(
+            self.status_of(lost)["errors"],
+            {"detail": "The order could not be placed."}
+        )
+        self.assertEqual(self.status_of(kept)["status"], "placed")
+
+    def test_worker_retries_failed_batch(self):
+        output = StringIO()
+
+        with patch(
+            "station.management.commands.process_order_queue"
+            ".place_queued_orders",
+            side_effect=[
+                OperationalError("lock timeout"),
+                Counter({"placed": 1}),
+                Counter(),
+            ],
+        ), self.assertLogs(
+            "station.management.commands.process_order_queue", "ERROR"
+        ):
+            call_command(
+                "process_order_queue",
+                drain=True,
+                idle_sleep=0,
+                stdout=output,
+            )
+
+        self.assertIn("Placed 1 queued order(s), 0 failed", output.getvalue())
+
+    def test_draining_worker_gives_up_on_failing_batches(self):
+        with patch(
+            "station.management.commands.process_order_queue"
+            ".place_queued_orders",
+            side_effect=OperationalError("lock timeout"),
+        ), self.assertLogs(
+            "station.management.commands.process_order_queue", "ERROR"
+        ), self.assertRaises(CommandError):
+            call_command("process_order_queue", drain=True, idle_sleep=0)
+
+    def test_queued_allocations_share_free_seats(self):
+        self.queue(order_payload(self.trip, [(1, 1)]))
+        first = self.queue(passengers_payload(self.trip, 2))
+        second = self.queue(passengers_payload(self.trip, 3))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            place_queued_orders(batch_size=10)
+
+        self.assertEqual(
+            [(ticket["cargo"], ticket["seat"])
+             for ticket in self.status_of(first)["order"]["tickets"]],
+            [(1, 2), (1, 3)]
+        )
+        self.assertEqual(
+            [(ticket["cargo"], ticket["seat"])
+             for ticket in self.status_of(second)["order"]["tickets"]],
+            [(1, 4), (1, 5), (1, 6)]
+        )
+        self.assertIsNotNone(shared_cache().get(index_key(self.trip.id, 2)))
+
+    def test_queued_allocation_beyond_free_seats_fails(self):
+        first = self.queue(passengers_payload(self.trip, 15))
+        second = self.queue(passengers_payload(self.trip, 10))
+
+        place_queued_orders(batch_size=10)
+
+        self.assertEqual(self.status_of(first)["status"], "placed")
+        self.assertEqual(
+            self.status_of(second)["errors"]["passengers"],
+            [f"Trip {self.trip.id} has fewer than 10 free seats"]
+        )
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.tickets_sold, 15)
+
+    def test_queued_order_from_hold_that_expired(self):
+        hold_id = self.client.post(
+            HOLD_URL, hold_payload(self.trip, [(1, 1)]), format="json"
+        ).data[0]["id"]
+        res = self.queue({"holds": [hold_id]})
+        expire_holds()
+
+        place_queued_orders(batch_size=10)
+
+        self.assertEqual(
+            self.status_of(res)["errors"]["holds"],
+            [f"Hold {hold_id} does not exist or has expired"]
+        )
+        self.assertFalse(Order.objects.exists())
+
+    def test_worker_batch_size(self):
+        for seat in range(1, 4):
+            self.queue(order_payload(self.trip, [(1, seat)]))
+
+        place_queued_orders(batch_size=2)
+
+        self.assertEqual(
+            QueuedOrder.objects.filter(status="pending").count(), 1
+        )
+        self.assertEqual(Trip.objects.get(id=self.trip.id).version, 2)
+
+    def test_status_of_another_users_order(self):
+        res = self.queue(order_payload(self.trip, [(1, 1)]))
+        other_client = APIClient()
+        other_client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="other@gmail.com",
+                password="password123",
+            )
+        )
+
+        self.assertEqual(
+            other_client.get(res["Location"]).status_code,
+            status.HTTP_404_NOT_FOUND
+        )
@@ -0,0 +1,166 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import (
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from station.models import Trip
+from station.replicas import (
+    ReplicaRouter,
+    pin_key,
+    pinned_to_primary,
+    primary,
+    use_replica,
+)
+from station.shared_cache import shared_cache
+from station.tests.test_order_api import sample_trip, order_payload
+
+TRIP_URL = reverse("station:trip-list")
+ORDER_URL = reverse("station:order-list")
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRouterTests(SimpleTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_use_primary_by_default(self):
+        self.assertEqual(self.router.db_for_read(Trip), DEFAULT_DB_ALIAS)
+
+    def test_reads_use_replica_when_enabled(self):
+        token = use_replica.set(True)
+        try:
+            self.assertEqual(self.router.db_for_read(Trip), "replica")
+            with primary():
+                self.assertEqual(
+                    self.router.db_for_read(Trip), DEFAULT_DB_ALIAS
+                )
+        finally:
+            use_replica.reset(token)
+
+    def test_reads_in_transaction_use_primary(self):
+        token = use_replica.set(True)
+        try:
+            with transaction.atomic():
+                self.assertEqual(
+                    self.router.db_for_read(Trip), DEFAULT_DB_ALIAS
+                )
+        finally:
+            use_replica.reset(token)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        token = use_replica.set(True)
+        try:
+            self.assertEqual(self.router.db_for_read(Trip), DEFAULT_DB_ALIAS)
+        finally:
+            use_replica.reset(token)
+
+    def test_writes_and_migrations_use_primary(self):
+        self.assertEqual(self.router.db_for_write(Trip), DEFAULT_DB_ALIAS)
+        self.assertIsNone(self.router.allow_migrate(DEFAULT_DB_ALIAS, "station"))
+        self.assertFalse(self.router.allow_migrate("replica", "station"))
+
+
+def table_queries(connection_queries, table):
+    return [
+        query["sql"]
+        for query in connection_queries
+        if f'"{table}"' in query["sql"]
+    ]
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+@patch("station.replicas.cache_is_shared", new=lambda: True)
+class ReplicaReadMixinTests(TransactionTestCase):
+    """Route requests between the primary and a replica alias that
+    mirrors it, so the queries each connection ran can be compared.
+    The shared cache is process-local in tests, which is enough for
+    pins set and read by the same process."""
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@gmail.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+        self.trip = sample_trip()
+
+    def request(self, method, url, data=None):
+        with CaptureQueriesContext(connections["default"]) as primary_db:
+            with CaptureQueriesContext(connections["replica"]) as replica:
+                res = getattr(self.client, method)(url, data, format="json")
+
+        return res, primary_db.captured_queries, replica.captured_queries
+
+    def test_safe_requests_read_from_replica(self):
+        res, primary_queries, replica_queries = self.request("get", TRIP_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertTrue(table_queries(replica_queries, "station_trip"))
+        self.assertFalse(table_queries(primary_queries, "station_trip"))
+        self.assertFalse(use_replica.get())
+
+    def test_atomic_blocks_read_from_primary(self):
+        token = use_replica.set(True)
+        try:
+            with CaptureQueriesContext(connections["replica"]) as replica:
+                with transaction.atomic():
+                    Trip.objects.count()
+            self.assertFalse(replica.captured_queries)
+
+            with CaptureQueriesContext(connections["replica"]) as replica:
+                Trip.objects.count()
+            self.assertEqual(len(replica.captured_queries), 1)
+        finally:
+            use_replica.reset(token)
+
+    def test_write_pins_user_to_primary(self):
+        res, _, replica_queries = self.request(
+            "post", ORDER_URL, order_payload(self.trip, [(1, 1)])
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(replica_queries)
+        self.assertTrue(pinned_to_primary(self.user))
+
+        res, primary_queries, replica_queries = self.request(
+            "get", ORDER_URL
+        )
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertTrue(table_queries(primary_queries, "station_order"))
+        self.assertFalse(replica_queries)
+
+        shared_cache().delete(pin_key(self.user))
+        _, _, replica_queries = self.request("get", ORDER_URL)
+        self.assertTrue(table_queries(replica_queries, "station_order"))
+
+    def test_failed_write_does_not_pin(self):
+        res, _, _ = self.request("post", ORDER_URL, {"tickets": []})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(pinned_to_primary(self.user))
+
+    def test_process_local_cache_keeps_reads_on_primary(self):
+        with patch("station.replicas.cache_is_shared", new=lambda: False):
+            _, primary_queries, replica_queries = self.request(
+                "get", TRIP_URL
+            )
+
+        self.assertTrue(table_queries(primary_queries, "station_trip"))
+        self.assertFalse(replica_queries)
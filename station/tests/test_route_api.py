@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 
@@ -57,6 +58,7 @@ class AuthenticatedRouteApiTests(TestCase):
             password="password123",
         )
         self.client.force_authenticate(self.user)
+        cache.clear()
 
     def test_list_routers(self):
         sample_route()
@@ -70,6 +72,16 @@ class AuthenticatedRouteApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_list_routes_invalidated_on_station_rename(self):
+        route = sample_route()
+        self.client.get(ROUTE_URL)
+
+        route.source.name = "Lviv"
+        route.source.save()
+        res = self.client.get(ROUTE_URL)
+
+        self.assertEqual(res.data[0]["source"], "Lviv")
+
     def test_retrieve_route_detail(self):
         route = sample_route()
 
@@ -0,0 +1,146 @@
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from station.models import Schedule, Trip
+from station.tests.test_trip_api import (
+    sample_route,
+    sample_train,
+    sample_crew,
+)
+
+SCHEDULE_URL = reverse("station:schedule-list")
+
+
+def sample_schedule(**params):
+    defaults = {
+        "route": sample_route(),
+        "train": sample_train(),
+        "departure_time": time(8, 30),
+        "duration": timedelta(hours=5, minutes=15),
+        "weekdays": "135",
+        "valid_from": date(2023, 10, 30),
+        "valid_until": date(2023, 11, 12),
+    }
+    defaults.update(params)
+
+    return Schedule.objects.create(**defaults)
+
+
+def expand_url(schedule_id):
+    return reverse("station:schedule-expand", args=[schedule_id])
+
+
+class AuthenticatedScheduleApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@gmail.com",
+            password="password123",
+        )
+        self.client.force_authenticate(self.user)
+        cache.clear()
+
+    def test_list_schedules(self):
+        sample_schedule()
+
+        res = self.client.get(SCHEDULE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+
+    def test_expand_schedule_forbidden(self):
+        schedule = sample_schedule()
+
+        res = self.client.post(expand_url(schedule.id))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AdminScheduleApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser(
+            email="admin@gmail.com",
+            password="admin"
+        )
+        self.client.force_authenticate(self.user)
+        cache.clear()
+
+    def test_create_schedule(self):
+        payload = {
+            "route": sample_route().id,
+            "train": sample_train().id,
+            "departure_time": "08:30",
+            "duration": "05:15:00",
+            "weekdays": "12345",
+            "valid_from": "2023-10-30",
+            "valid_until": "2023-12-31",
+            "crews": [sample_crew().id],
+        }
+
+        res = self.client.post(SCHEDULE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        schedule = Schedule.objects.get(id=res.data["id"])
+        self.assertEqual(schedule.duration, timedelta(hours=5, minutes=15))
+
+    def test_create_schedule_invalid(self):
+        payload = {
+            "route": sample_route().id,
+            "train": sample_train().id,
+            "departure_time": "08:30",
+            "duration": "05:15:00",
+            "weekdays": "08",
+            "valid_from": "2023-12-31",
+            "valid_until": "2023-10-30",
+        }
+
+        res = self.client.post(SCHEDULE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("weekdays", res.data)
+
+    def test_expand_schedule(self):
+        crews = [sample_crew(), sample_crew()]
+        schedule = sample_schedule()
+        schedule.crews.set(crews)
+
+        res = self.client.post(expand_url(schedule.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 6)
+        trips = Trip.objects.filter(schedule=schedule).order_by(
+            "departure_time"
+        )
+        self.assertEqual(
+            [trip.departure_time.isoweekday() for trip in trips],
+            [1, 3, 5, 1, 3, 5]
+        )
+        self.assertEqual(
+            trips[0].departure_time, datetime(2023, 10, 30, 8, 30)
+        )
+        self.assertEqual(
+            trips[0].arrival_time, datetime(2023, 10, 30, 13, 45)
+        )
+        self.assertEqual(
+            Trip.crews.through.objects.filter(trip__schedule=schedule).count(),
+            12
+        )
+
+    def test_expand_schedule_is_idempotent(self):
+        schedule = sample_schedule()
+        self.client.post(expand_url(schedule.id))
+        Trip.objects.filter(schedule=schedule).first().delete()
+
+        with self.assertNumQueries(8):
+            res = self.client.post(expand_url(schedule.id))
+
+        self.assertEqual(res.data["created"], 1)
+        self.assertEqual(Trip.objects.filter(schedule=schedule).count(), 6)
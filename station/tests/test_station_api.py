@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 
@@ -6,9 +7,13 @@ from rest_framework.test import APIClient
 from rest_framework import status
 
 from station.models import Station
+from station.search import station_names
 from station.serializers import StationSerializer
+from station.shared_cache import local_key, shared_cache
 
 STATION_URL = reverse("station:station-list")
+AUTOCOMPLETE_URL = reverse("station:station-autocomplete")
+NEARBY_URL = reverse("station:station-nearby")
 
 
 def sample_station(**params):
@@ -39,6 +44,7 @@ class AuthenticatedStationApiTests(TestCase):
             password="password123",
         )
         self.client.force_authenticate(self.user)
+        cache.clear()
 
     def test_list_stations(self):
         sample_station()
@@ -52,6 +58,129 @@ class AuthenticatedStationApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_list_stations_cached(self):
+        sample_station()
+        res = self.client.get(STATION_URL)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(STATION_URL)
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached.content, res.content)
+        self.assertEqual(cached["ETag"], res["ETag"])
+
+    def test_list_stations_not_modified(self):
+        sample_station()
+        etag = self.client.get(STATION_URL)["ETag"]
+
+        res = self.client.get(STATION_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+        self.assertFalse(res.content)
+
+    def test_list_stations_invalidated_on_change(self):
+        station = sample_station()
+        etag = self.client.get(STATION_URL)["ETag"]
+
+        station.name = "Kyiv"
+        station.save()
+        res = self.client.get(STATION_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(res.data[0]["name"], "Kyiv")
+
+    def test_autocomplete_stations(self):
+        kyiv = sample_station(name="Kyiv-Passenger")
+        sample_station(name="Kharkiv-Passenger")
+        sample_station(name="Lviv")
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "kie"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "KY"})
+        self.assertEqual(res.data, [{"id": kyiv.id, "name": kyiv.name}])
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "pass", "limit": 1})
+        self.assertEqual(len(res.data), 1)
+
+    def test_autocomplete_without_database_queries(self):
+        sample_station(name="Lviv")
+        self.client.get(AUTOCOMPLETE_URL, {"q": "l"})
+
+        with self.assertNumQueries(0):
+            res = self.client.get(AUTOCOMPLETE_URL, {"q": "lv"})
+
+        self.assertEqual(len(res.data), 1)
+
+    def test_autocomplete_after_station_change(self):
+        station = sample_station(name="Lviv")
+        self.client.get(AUTOCOMPLETE_URL, {"q": "lv"})
+
+        station.name = "Odesa"
+        station.save()
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "lv"})
+
+        self.assertEqual(res.data, [])
+
+    def test_autocomplete_after_change_in_other_process(self):
+        station = sample_station(name="Lviv")
+        self.client.get(AUTOCOMPLETE_URL, {"q": "lv"})
+        Station.objects.filter(id=station.id).update(name="Odesa")
+        shared_cache().set(station_names.cache_key, "other-process", None)
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "lv"})
+        self.assertEqual(len(res.data), 1)
+
+        # The local copy of the generation token has expired.
+        cache.delete(local_key(station_names.cache_key))
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "lv"})
+        self.assertEqual(res.data, [])
+
+    def test_nearby_stations(self):
+        kyiv = sample_station(
+            name="Kyiv-Passenger", latitude=50.4406, longitude=30.4891
+        )
+        darnytsia = sample_station(
+            name="Darnytsia", latitude=50.4558, longitude=30.6286
+        )
+        sample_station(name="Lviv", latitude=49.8397, longitude=24.0297)
+        sample_station(name="Unknown", latitude=None, longitude=None)
+
+        res = self.client.get(
+            NEARBY_URL, {"lat": 50.4501, "lon": 30.5234, "radius": 20}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [station["id"] for station in res.data], [kyiv.id, darnytsia.id]
+        )
+        self.assertAlmostEqual(res.data[0]["distance"], 2.63, places=1)
+
+        res = self.client.get(
+            NEARBY_URL, {"lat": 50.4501, "lon": 30.5234, "radius": 500}
+        )
+        self.assertEqual(len(res.data), 3)
+
+    def test_nearby_stations_across_antimeridian(self):
+        east = sample_station(name="East", latitude=65.0, longitude=179.9)
+        west = sample_station(name="West", latitude=65.0, longitude=-179.9)
+
+        res = self.client.get(
+            NEARBY_URL, {"lat": 65.0, "lon": 179.95, "radius": 10, "limit": 5}
+        )
+
+        self.assertEqual(
+            [station["id"] for station in res.data], [east.id, west.id]
+        )
+
+    def test_nearby_stations_invalid_point(self):
+        res = self.client.get(NEARBY_URL, {"lat": 91, "lon": 30})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_create_station_forbidden(self):
         payload = {
             "name": "Station",
@@ -1,17 +1,31 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.db.models import F, Count
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from station.models import Station, Route, TrainType, Train, Crew, Trip
+from station.models import (
+    Station,
+    Route,
+    TrainType,
+    Train,
+    Crew,
+    Trip,
+    Order,
+    SeatHold,
+    Ticket,
+)
 from station.serializers import TripListSerializer, TripDetailSerializer
 
 TRIP_URL = reverse("station:trip-list")
+CONNECTIONS_URL = reverse("station:trip-connections")
 
 
 def sample_station(**params):
@@ -102,6 +116,7 @@ class AuthenticatedTripApiTests(TestCase):
             password="password123",
         )
         self.client.force_authenticate(self.user)
+        cache.clear()
 
     def test_list_trips(self):
         sample_trip()
@@ -117,7 +132,7 @@ class AuthenticatedTripApiTests(TestCase):
         serializer = TripListSerializer(trips, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_filter_trips_by_source(self):
         trip1 = sample_trip()
@@ -133,9 +148,9 @@ class AuthenticatedTripApiTests(TestCase):
         serializer2 = TripListSerializer(trip2)
         serializer3 = TripListSerializer(trip3)
 
-        self.assertEqual(serializer1.data["id"], res.data[0]["id"])
-        self.assertNotIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertEqual(serializer1.data["id"], res.data["results"][0]["id"])
+        self.assertNotIn(serializer2.data, res.data["results"])
+        self.assertNotIn(serializer3.data, res.data["results"])
 
     def test_filter_trips_by_destination(self):
         trip1 = sample_trip()
@@ -151,9 +166,123 @@ class AuthenticatedTripApiTests(TestCase):
         serializer2 = TripListSerializer(trip2)
         serializer3 = TripListSerializer(trip3)
 
-        self.assertNotIn(serializer1.data, res.data)
-        self.assertEqual(serializer2.data["id"], res.data[0]["id"])
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertNotIn(serializer1.data, res.data["results"])
+        self.assertEqual(serializer2.data["id"], res.data["results"][0]["id"])
+        self.assertNotIn(serializer3.data, res.data["results"])
+
+    def test_filter_trips_by_source_alias(self):
+        trip1 = sample_trip(route=sample_route(
+            source=sample_station(name="Kyiv-Passenger")
+        ))
+        sample_trip()
+
+        res = self.client.get(TRIP_URL, {"source": "kiev"})
+
+        self.assertEqual(
+            [trip["id"] for trip in res.data["results"]], [trip1.id]
+        )
+
+    def test_filter_trips_by_destination_ignores_diacritics(self):
+        trip1 = sample_trip(route=sample_route(
+            destination=sample_station(name="Užhorod")
+        ))
+        sample_trip()
+
+        res = self.client.get(TRIP_URL, {"destination": "UZHOROD"})
+
+        self.assertEqual(
+            [trip["id"] for trip in res.data["results"]], [trip1.id]
+        )
+
+    def test_filter_trips_by_renamed_station(self):
+        trip = sample_trip()
+        self.client.get(TRIP_URL, {"source": "Odesa"})
+
+        trip.route.source.name = "Odesa-Holovna"
+        trip.route.source.save()
+        res = self.client.get(TRIP_URL, {"source": "Odesa"})
+
+        self.assertEqual(
+            [trip["id"] for trip in res.data["results"]], [trip.id]
+        )
+
+    def test_filter_trips_by_departure_date(self):
+        trip1 = sample_trip(departure_time=datetime(2022, 6, 2, 0, 0))
+        trip2 = sample_trip(departure_time=datetime(2022, 6, 2, 23, 59))
+        sample_trip(departure_time=datetime(2022, 6, 3, 0, 0))
+
+        res = self.client.get(TRIP_URL, {"departure_time": "2022-06-02"})
+
+        self.assertEqual(
+            [trip["id"] for trip in res.data["results"]],
+            [trip2.id, trip1.id]
+        )
+
+    def test_filter_trips_by_departure_range(self):
+        sample_trip(departure_time=datetime(2022, 6, 2, 7, 59))
+        trip = sample_trip(departure_time=datetime(2022, 6, 2, 8, 0))
+        sample_trip(departure_time=datetime(2022, 6, 2, 12, 0))
+
+        res = self.client.get(
+            TRIP_URL,
+            {
+                "departure_after": "2022-06-02T08:00",
+                "departure_before": "2022-06-02T12:00"
+            }
+        )
+
+        self.assertEqual(
+            [trip["id"] for trip in res.data["results"]], [trip.id]
+        )
+
+    def test_filter_trips_by_invalid_date(self):
+        res = self.client.get(TRIP_URL, {"departure_time": "02.06.2022"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_trips_by_aware_datetime(self):
+        for value in ("2022-06-02T08:00Z", "2022-06-02T08:00+02:00"):
+            res = self.client.get(TRIP_URL, {"departure_after": value})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(
+                res.data["departure_after"],
+                f"Time zone offsets are not supported: {value}"
+            )
+
+    def test_filter_trips_by_departure_date_uses_index(self):
+        trip = sample_trip()
+        start = datetime(2022, 1, 1, 6, 0)
+        Trip.objects.bulk_create(
+            Trip(
+                route=trip.route,
+                train=trip.train,
+                departure_time=start + timedelta(hours=hours),
+                arrival_time=start + timedelta(hours=hours + 2),
+            )
+            for hours in range(0, 24 * 365, 4)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(TRIP_URL, {"departure_time": "2022-06-02"})
+        sql = next(
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith("SELECT")
+            and "station_trip" in query["sql"]
+        )
+
+        explain = (
+            "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite"
+            else "EXPLAIN "
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(explain + sql)
+            plan = " ".join(str(row) for row in cursor.fetchall())
+
+        self.assertIn("trip_departure_time_id_idx", plan)
 
     def test_retrieve_trip_detail(self):
         trip = sample_trip()
@@ -165,6 +294,192 @@ class AuthenticatedTripApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_retrieve_trip_seat_map(self):
+        trip = sample_trip(
+            train=sample_train(cargo_num=2, places_in_cargo=10)
+        )
+        order = Order.objects.create(user=self.user)
+        for cargo, seat in ((1, 1), (1, 2), (1, 3), (1, 9), (2, 10)):
+            Ticket.objects.create(
+                trip=trip, order=order, cargo=cargo, seat=seat
+            )
+
+        url = detail_url(trip.id)
+        bitmap = self.client.get(url, {"seats": "bitmap"})
+        ranges = self.client.get(url, {"seats": "ranges"})
+
+        self.assertEqual(bitmap.status_code, status.HTTP_200_OK)
+        self.assertNotIn("taken_seats", bitmap.data)
+        self.assertEqual(bitmap.data["seat_map"]["cargos"], ["BwE=", "AAI="])
+        self.assertEqual(
+            ranges.data["seat_map"]["cargos"],
+            [[[1, 3], [9, 9]], [[10, 10]]]
+        )
+
+    def test_retrieve_trip_invalid_seat_map(self):
+        trip = sample_trip()
+
+        res = self.client.get(detail_url(trip.id), {"seats": "unknown"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve_trip_not_modified(self):
+        trip = sample_trip()
+        url = detail_url(trip.id)
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+        self.assertNotEqual(
+            self.client.get(url, {"seats": "bitmap"})["ETag"], etag
+        )
+
+    def test_retrieve_trip_modified_by_tickets(self):
+        trip = sample_trip()
+        url = detail_url(trip.id)
+        etag = self.client.get(url)["ETag"]
+
+        ticket = Ticket.objects.create(
+            trip=trip,
+            order=Order.objects.create(user=self.user),
+            cargo=1,
+            seat=1,
+        )
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["taken_seats"], [{"cargo": 1, "seat": 1}])
+
+        ticket.delete()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["taken_seats"], [])
+
+    def test_retrieve_trip_taken_seats_merge_tickets_and_holds(self):
+        trip = sample_trip()
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(trip=trip, order=order, cargo=2, seat=3)
+        SeatHold.objects.create(
+            trip=trip,
+            cargo=1,
+            seat=5,
+            user=self.user,
+            expires_at=datetime.now() + timedelta(minutes=5),
+        )
+        SeatHold.objects.create(
+            trip=trip,
+            cargo=1,
+            seat=6,
+            user=self.user,
+            expires_at=datetime.now() - timedelta(minutes=5),
+        )
+        self.client.get(detail_url(trip.id))
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(detail_url(trip.id))
+        for seat in range(1, 6):
+            Ticket.objects.create(trip=trip, order=order, cargo=3, seat=seat)
+        cache.clear()
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.get(detail_url(trip.id))
+
+        self.assertEqual(len(many), len(few))
+        self.assertEqual(
+            res.data["taken_seats"],
+            [{"cargo": 1, "seat": 5}, {"cargo": 2, "seat": 3}]
+            + [{"cargo": 3, "seat": seat} for seat in range(1, 6)],
+        )
+
+    def test_retrieve_trip_modified_by_trip_changes(self):
+        trip = sample_trip()
+        url = detail_url(trip.id)
+        etags = [self.client.get(url)["ETag"]]
+
+        trip.arrival_time += timedelta(minutes=5)
+        trip.save()
+        etags.append(self.client.get(url)["ETag"])
+        trip.crews.add(sample_crew())
+        etags.append(self.client.get(url)["ETag"])
+        trip.train.name = "Intercity"
+        trip.train.save()
+        etags.append(self.client.get(url)["ETag"])
+
+        self.assertEqual(len(set(etags)), 4)
+        self.assertEqual(trip.version, 2)
+
+    def test_retrieve_missing_trip(self):
+        res = self.client.get(detail_url(0))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_connections(self):
+        kyiv, vinnytsia, lviv = (
+            sample_station(name=name) for name in ("Kyiv", "Vinnytsia", "Lviv")
+        )
+        train = sample_train()
+
+        def trip(source, destination, departure, arrival):
+            return sample_trip(
+                train=train,
+                route=sample_route(source=source, destination=destination),
+                departure_time=datetime(2022, 6, 2, *departure),
+                arrival_time=datetime(2022, 6, 2, *arrival),
+            )
+
+        first = trip(kyiv, vinnytsia, (8, 0), (10, 0))
+        tight = trip(vinnytsia, lviv, (10, 5), (11, 30))
+        second = trip(vinnytsia, lviv, (10, 30), (12, 0))
+        trip(kyiv, lviv, (9, 0), (13, 0))
+        params = {
+            "from": kyiv.id,
+            "to": lviv.id,
+            "departure_after": "2022-06-02T07:00",
+        }
+
+        res = self.client.get(CONNECTIONS_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [trip["id"] for trip in res.data["trips"]], [first.id, second.id]
+        )
+        self.assertEqual(res.data["arrival_time"], "2022-06-02T12:00:00")
+
+        res = self.client.get(CONNECTIONS_URL, {**params, "min_transfer": 0})
+        self.assertEqual(
+            [trip["id"] for trip in res.data["trips"]], [first.id, tight.id]
+        )
+
+        res = self.client.get(CONNECTIONS_URL, {**params, "min_transfer": -60})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["min_transfer"], "Must be 0 or more.")
+
+        direct = trip(kyiv, lviv, (8, 30), (10, 30))
+        res = self.client.get(CONNECTIONS_URL, params)
+        self.assertEqual(
+            [trip["id"] for trip in res.data["trips"]], [direct.id]
+        )
+
+        res = self.client.get(
+            CONNECTIONS_URL, {**params, "departure_after": "2022-06-02T09:01"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_connections_with_aware_departure(self):
+        source, destination = sample_station(), sample_station()
+
+        res = self.client.get(CONNECTIONS_URL, {
+            "from": source.id,
+            "to": destination.id,
+            "departure_after": "2022-06-02T07:00Z",
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("departure_after", res.data)
+
     def test_create_trip_forbidden(self):
         payload = {
             "train": sample_train(),
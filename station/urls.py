@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from station.async_views import station_list, trip_list, trip_detail
 from station.views import (
     TrainTypesViewSet,
     TrainViewSet,
@@ -9,6 +10,10 @@ from station.views import (
     CrewViewSet,
     TripViewSet,
     OrderViewSet,
+    JourneyViewSet,
+    ScheduleViewSet,
+    SeatHoldViewSet,
+    QueuedOrderViewSet,
 )
 
 router = routers.DefaultRouter()
@@ -18,11 +23,18 @@ router.register("stations", StationViewSet)
 router.register("routes", RouteViewSet)
 router.register("crews", CrewViewSet)
 router.register("trips", TripViewSet)
+router.register("schedules", ScheduleViewSet)
+router.register("holds", SeatHoldViewSet)
+router.register("orders/queue", QueuedOrderViewSet)
 router.register("orders", OrderViewSet)
+router.register("journeys", JourneyViewSet, basename="journey")
 
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("async/stations/", station_list, name="async-station-list"),
+    path("async/trips/", trip_list, name="async-trip-list"),
+    path("async/trips/<int:pk>/", trip_detail, name="async-trip-detail"),
 ]
 
 app_name = "station"
@@ -1,15 +1,25 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from django.db.models import F, Count
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils.http import quote_etag
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
     extend_schema,
     OpenApiParameter,
     OpenApiExample
 )
-from rest_framework import viewsets, mixins
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import IsAuthenticated
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import (
+    CursorPagination,
+    PageNumberPagination,
+    _reverse_ordering,
+)
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.response import Response
 
 from station.models import (
     TrainType,
@@ -19,25 +29,67 @@ from station.models import (
     Crew,
     Trip,
     Order,
+    Schedule,
+    SeatHold,
+    QueuedOrder,
 )
+from station.connections import timetable
+from station.exports import EXPORT_FORMATS, ticket_rows
+from station.filters import filter_trips, get_datetime_param
+from station.geo import station_grid
+from station.idempotency import IDEMPOTENCY_HEADER, IdempotentCreateMixin
+from station.journeys import route_graph
+from station.order_queue import QueuedCreateMixin
 from station.permissions import IsAdminOrIfAuthenticatedReadOnly
+from station.replicas import ReplicaReadMixin
+from station.response_cache import CachedListMixin, etag_matches
+from station.schedules import expand_schedule
+from station.search import station_names
 from station.serializers import (
     TrainTypeSerializer,
     TrainSerializer,
     StationSerializer,
+    StationAutocompleteSerializer,
+    NearbyStationSerializer,
+    JourneySerializer,
+    ConnectionSerializer,
+    ScheduleSerializer,
+    ScheduleExpansionSerializer,
     RouteSerializer,
     CrewSerializer,
     TripSerializer,
     OrderSerializer,
+    QueuedOrderSerializer,
     TripListSerializer,
     TripDetailSerializer,
+    TripSeatMapSerializer,
     RouteDetailSerializer,
     OrderListSerializer,
     RouteListSerializer,
+    SeatHoldSerializer,
 )
 
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+MIN_TRANSFER_MINUTES = 10
+NEARBY_RADIUS_KM = 50
+NEARBY_MAX_RADIUS_KM = 500
+NEARBY_LIMIT = 10
+NEARBY_MAX_LIMIT = 50
+
+
+def get_station_param(request, name):
+    try:
+        return int(request.query_params[name])
+    except KeyError:
+        raise ValidationError({name: "This parameter is required."})
+    except ValueError:
+        raise ValidationError({name: "A valid station id is required."})
+
 
 class TrainTypesViewSet(
+    ReplicaReadMixin,
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet
@@ -45,9 +97,12 @@ class TrainTypesViewSet(
     queryset = TrainType.objects.all()
     serializer_class = TrainTypeSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_models = (TrainType,)
 
 
 class TrainViewSet(
+    ReplicaReadMixin,
+    CachedListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     viewsets.GenericViewSet,
@@ -55,9 +110,12 @@ class TrainViewSet(
     queryset = Train.objects.select_related("train_type")
     serializer_class = TrainSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_models = (Train, TrainType)
 
 
 class StationViewSet(
+    ReplicaReadMixin,
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet
@@ -65,9 +123,128 @@ class StationViewSet(
     queryset = Station.objects.all()
     serializer_class = StationSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_models = (Station,)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "q",
+                type=OpenApiTypes.STR,
+                description="Beginning of a word of the station name "
+                            "(ex. ?q=kyi)",
+                required=True,
+            ),
+            OpenApiParameter(
+                "limit",
+                type=OpenApiTypes.INT,
+                description="Maximum number of suggestions "
+                            f"(default {AUTOCOMPLETE_LIMIT}, "
+                            f"max {AUTOCOMPLETE_MAX_LIMIT})",
+            ),
+        ],
+        responses=StationAutocompleteSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"])
+    def autocomplete(self, request):
+        """Suggest stations from the in-memory name index"""
+        try:
+            limit = min(
+                int(request.query_params.get("limit", AUTOCOMPLETE_LIMIT)),
+                AUTOCOMPLETE_MAX_LIMIT
+            )
+        except ValueError:
+            raise ValidationError({"limit": "A valid integer is required."})
+
+        suggestions = station_names.autocomplete(
+            request.query_params.get("q", ""), max(limit, 1)
+        )
+        serializer = StationAutocompleteSerializer(
+            [
+                {"id": station_id, "name": name}
+                for station_id, name in suggestions
+            ],
+            many=True
+        )
+
+        return Response(serializer.data)
+
+    @staticmethod
+    def get_float_param(request, name, low, high, default=None):
+        value = request.query_params.get(name, default)
+        if value is None:
+            raise ValidationError({name: "This parameter is required."})
+
+        try:
+            value = float(value)
+        except ValueError:
+            raise ValidationError({name: "A valid number is required."})
+        if not high >= value >= low:
+            raise ValidationError(
+                {name: f"Must be between {low} and {high}."}
+            )
+
+        return value
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "lat",
+                type=OpenApiTypes.FLOAT,
+                description="Latitude of the point (ex. ?lat=50.45)",
+                required=True,
+            ),
+            OpenApiParameter(
+                "lon",
+                type=OpenApiTypes.FLOAT,
+                description="Longitude of the point (ex. ?lon=30.52)",
+                required=True,
+            ),
+            OpenApiParameter(
+                "radius",
+                type=OpenApiTypes.FLOAT,
+                description=f"Search radius in km "
+                            f"(default {NEARBY_RADIUS_KM}, "
+                            f"max {NEARBY_MAX_RADIUS_KM})",
+            ),
+            OpenApiParameter(
+                "limit",
+                type=OpenApiTypes.INT,
+                description=f"Maximum number of stations "
+                            f"(default {NEARBY_LIMIT}, "
+                            f"max {NEARBY_MAX_LIMIT})",
+            ),
+        ],
+        responses=NearbyStationSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"])
+    def nearby(self, request):
+        """List the stations nearest to a point, nearest first"""
+        latitude = self.get_float_param(request, "lat", -90, 90)
+        longitude = self.get_float_param(request, "lon", -180, 180)
+        radius = self.get_float_param(
+            request, "radius", 0, NEARBY_MAX_RADIUS_KM, NEARBY_RADIUS_KM
+        )
+        limit = int(self.get_float_param(
+            request, "limit", 1, NEARBY_MAX_LIMIT, NEARBY_LIMIT
+        ))
+
+        nearest = station_grid.nearest(latitude, longitude, radius, limit)
+        stations = Station.objects.in_bulk(
+            [station_id for _, station_id in nearest]
+        )
+        nearby = []
+        for distance, station_id in nearest:
+            if station_id in stations:
+                stations[station_id].distance = round(distance, 3)
+                nearby.append(stations[station_id])
+        serializer = NearbyStationSerializer(nearby, many=True)
+
+        return Response(serializer.data)
 
 
 class RouteViewSet(
+    ReplicaReadMixin,
+    CachedListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -76,6 +253,7 @@ class RouteViewSet(
     queryset = Route.objects.select_related("source", "destination")
     serializer_class = RouteSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_models = (Route, Station)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -87,7 +265,54 @@ class RouteViewSet(
         return RouteSerializer
 
 
+class JourneyViewSet(ReplicaReadMixin, viewsets.ViewSet):
+    permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "from",
+                type=OpenApiTypes.INT,
+                description="Id of the departure station (ex. ?from=1)",
+                required=True,
+            ),
+            OpenApiParameter(
+                "to",
+                type=OpenApiTypes.INT,
+                description="Id of the arrival station (ex. ?to=3)",
+                required=True,
+            ),
+        ],
+        responses=JourneySerializer,
+    )
+    def list(self, request):
+        """Find the shortest chain of routes between two stations"""
+        source = get_station_param(request, "from")
+        destination = get_station_param(request, "to")
+
+        graph = route_graph.get()
+        journey = None
+        # Stations without routes are not in the graph.
+        if source in graph.names and destination in graph.names:
+            journey = graph.shortest_path(source, destination)
+        if journey is None:
+            raise NotFound("No journey between these stations.")
+
+        serializer = JourneySerializer({
+            "distance": journey.distance,
+            "stations": [
+                {"id": station_id, "name": graph.names[station_id]}
+                for station_id in journey.stations
+            ],
+            "routes": journey.routes,
+        })
+
+        return Response(serializer.data)
+
+
 class CrewViewSet(
+    ReplicaReadMixin,
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet
@@ -95,62 +320,172 @@ class CrewViewSet(
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    cache_models = (Crew,)
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination with page numbers still available via ?page=."""
+
+    page_number_class = PageNumberPagination
+    page_number_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+
+        if self.page_number_class.page_query_param in request.query_params:
+            self.page_number_paginator = self.page_number_class()
+            return self.page_number_paginator.paginate_queryset(
+                queryset, request, view
+            )
+
+        return self.paginate_results(list(
+            self.page_queryset(queryset, request, view)
+        ))
+
+    def page_queryset(self, queryset, request, view=None):
+        """Return the queryset of the cursor's page plus one trip, so the
+        caller can evaluate it with the sync or the async ORM and hand
+        the results to paginate_results."""
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, position = self.cursor or (0, False, None)
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if position is not None:
+            order = self.ordering[0]
+            lookup = "lt" if reverse != order.startswith("-") else "gt"
+            queryset = queryset.filter(
+                **{f"{order.lstrip('-')}__{lookup}": position}
+            )
+
+        return queryset[offset:offset + self.page_size + 1]
+
+    def paginate_results(self, results):
+        """Set up the links of a page from page_queryset's results, as
+        CursorPagination.paginate_queryset does, and return the page."""
+        offset, reverse, position = self.cursor or (0, False, None)
+        self.page = results[:self.page_size]
+        following = None
+        if len(results) > len(self.page):
+            following = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
 
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None or offset > 0
+            self.has_previous = following is not None
+            self.next_position = position
+            self.previous_position = following
+        else:
+            self.has_next = following is not None
+            self.has_previous = position is not None or offset > 0
+            self.next_position = following
+            self.previous_position = position
+
+        if (self.has_previous or self.has_next) and self.template:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_paginated_response(self, data):
+        if self.page_number_paginator:
+            return self.page_number_paginator.get_paginated_response(data)
+
+        return super().get_paginated_response(data)
+
+
+class TripPageNumberPagination(PageNumberPagination):
+    page_size = 20
+
+
+class TripPagination(KeysetPagination):
+    page_size = 20
+    ordering = ("-departure_time", "-id")
+    page_number_class = TripPageNumberPagination
+
+
+class TripViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
+    seat_map_encodings = ("list", "bitmap", "ranges")
 
-class TripViewSet(viewsets.ModelViewSet):
     queryset = Trip.objects.select_related(
-        "route__source", "route__destination"
-    ).annotate(
-        tickets_available=(
-            F("train__cargo_num") * F("train__places_in_cargo")
-            - Count("tickets")
-        )
-    )
+        "route__source", "route__destination", "train"
+    ).with_tickets_available()
     serializer_class = TripSerializer
+    pagination_class = TripPagination
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
     def get_queryset(self):
-        queryset = self.queryset
+        queryset = super().get_queryset()
 
         if self.action == "retrieve":
             queryset = queryset.select_related(
                 "train__train_type"
             ).prefetch_related("crews")
 
-        source = self.request.query_params.get("source")
-        destination = self.request.query_params.get("destination")
-        departure_time = self.request.query_params.get("departure_time")
-        arrival_time = self.request.query_params.get("arrival_time")
-
-        if departure_time:
-            departure_time = datetime.strptime(
-                departure_time, "%Y-%m-%d"
-            ).date()
-            queryset = queryset.filter(departure_time__date=departure_time)
-
-        if arrival_time:
-            arrival_time = datetime.strptime(arrival_time, "%Y-%m-%d").date()
-            queryset = queryset.filter(arrival_time__date=arrival_time)
-
-        if source:
-            queryset = queryset.filter(route__source__name__icontains=source)
-
-        if destination:
-            queryset = queryset.filter(
-                route__destination__name__icontains=destination
-            )
-
-        return queryset.distinct()
+        return filter_trips(queryset, self.request.query_params)
 
     def get_serializer_class(self):
         if self.action == "list":
             return TripListSerializer
 
         if self.action == "retrieve":
+            if self.get_seat_map_encoding() != "list":
+                return TripSeatMapSerializer
+
             return TripDetailSerializer
 
         return TripSerializer
 
+    @classmethod
+    def seat_map_encoding(cls, query_params):
+        encoding = query_params.get("seats", "list")
+
+        if encoding not in cls.seat_map_encodings:
+            raise ValidationError(
+                {"seats": f"Must be one of: "
+                          f"{', '.join(cls.seat_map_encodings)}"}
+            )
+
+        return encoding
+
+    def get_seat_map_encoding(self):
+        return self.seat_map_encoding(self.request.query_params)
+
+    @staticmethod
+    def detail_etag(pk, encoding, renderer_format):
+        """Return the ETag of a trip's detail response, or raise NotFound.
+
+        Read the version before the trip itself: a response newer than
+        its ETag only costs the client one extra download.
+        Holds expire without a write, so the count of active holds is
+        part of the ETag too. New holds always bump the version.
+        """
+        try:
+            state = Trip.objects.filter(
+                pk=pk
+            ).with_seats_held().values_list("version", "seats_held").first()
+        except ValueError:
+            state = None
+        if state is None:
+            raise NotFound()
+
+        return quote_etag(
+            f"{pk}-{state[0]}.{state[1]}-{encoding}-{renderer_format}"
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == "retrieve":
+            context["seat_map_encoding"] = self.get_seat_map_encoding()
+
+        return context
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -200,18 +535,210 @@ class TripViewSet(viewsets.ModelViewSet):
                     )
                 ]
             ),
+            OpenApiParameter(
+                "departure_after",
+                type=OpenApiTypes.DATETIME,
+                description="Filter by departure at or after the given "
+                            "time (ex. ?departure_after=2023-10-31T08:00)",
+                examples=[
+                    OpenApiExample(
+                        "Example",
+                        value="2023-10-31T08:00",
+                    )
+                ]
+            ),
+            OpenApiParameter(
+                "departure_before",
+                type=OpenApiTypes.DATETIME,
+                description="Filter by departure before the given time "
+                            "(ex. ?departure_before=2023-10-31T18:00)",
+                examples=[
+                    OpenApiExample(
+                        "Example",
+                        value="2023-10-31T18:00",
+                    )
+                ]
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "seats",
+                type=OpenApiTypes.STR,
+                enum=seat_map_encodings,
+                description="Format of taken seats: list of cargo/seat "
+                            "objects (default), base64 bitmap per cargo "
+                            "or taken seat ranges per cargo "
+                            "(ex. ?seats=bitmap)",
+            ),
+        ]
+    )
+    def retrieve(self, request, *args, **kwargs):
+        etag = self.detail_etag(
+            kwargs["pk"],
+            self.get_seat_map_encoding(),
+            request.accepted_renderer.format,
+        )
+        if etag_matches(request, etag):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+
+        response = super().retrieve(request, *args, **kwargs)
+        response["ETag"] = etag
+
+        return response
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "from",
+                type=OpenApiTypes.INT,
+                description="Id of the departure station (ex. ?from=1)",
+                required=True,
+            ),
+            OpenApiParameter(
+                "to",
+                type=OpenApiTypes.INT,
+                description="Id of the arrival station (ex. ?to=3)",
+                required=True,
+            ),
+            OpenApiParameter(
+                "departure_after",
+                type=OpenApiTypes.DATETIME,
+                description="Earliest departure, now by default "
+                            "(ex. ?departure_after=2023-10-31T08:00)",
+            ),
+            OpenApiParameter(
+                "min_transfer",
+                type=OpenApiTypes.INT,
+                description="Minimum minutes between trips at a station "
+                            f"(default {MIN_TRANSFER_MINUTES})",
+            ),
+        ],
+        responses=ConnectionSerializer,
+    )
+    @action(detail=False, methods=["get"])
+    def connections(self, request):
+        """Find the earliest arriving chain of trips between two stations"""
+        source = get_station_param(request, "from")
+        destination = get_station_param(request, "to")
+        departure = (
+            get_datetime_param(request.query_params, "departure_after")
+            or datetime.now()
+        )
+        try:
+            minutes = int(request.query_params.get(
+                "min_transfer", MIN_TRANSFER_MINUTES
+            ))
+        except ValueError:
+            raise ValidationError(
+                {"min_transfer": "A valid integer is required."}
+            )
+        if minutes < 0:
+            raise ValidationError({"min_transfer": "Must be 0 or more."})
+        transfer = timedelta(minutes=minutes)
+
+        trip_ids = timetable.earliest_arrival(
+            source, destination, departure, transfer
+        )
+        if trip_ids is None:
+            raise NotFound("No connection between these stations.")
+
+        trips = Trip.objects.select_related(
+            "route__source", "route__destination", "train"
+        ).with_tickets_available().in_bulk(trip_ids)
+        serializer = ConnectionSerializer({
+            "departure_time": trips[trip_ids[0]].departure_time,
+            "arrival_time": trips[trip_ids[-1]].arrival_time,
+            "trips": [trips[trip_id] for trip_id in trip_ids],
+        })
+
+        return Response(serializer.data)
+
+
+class ScheduleViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
+    queryset = Schedule.objects.select_related(
+        "route", "train"
+    ).prefetch_related("crews")
+    serializer_class = ScheduleSerializer
+    permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+
+    @extend_schema(request=None, responses=ScheduleExpansionSerializer)
+    @action(detail=True, methods=["post"])
+    def expand(self, request, pk=None):
+        """Create the missing trips of the schedule"""
+        trips = expand_schedule(self.get_object())
+        serializer = ScheduleExpansionSerializer({"created": len(trips)})
+
+        return Response(serializer.data)
+
+
+class SeatHoldViewSet(
+    ReplicaReadMixin,
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = SeatHold.objects.active()
+    serializer_class = SeatHoldSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user)
+
+    @extend_schema(
+        request=SeatHoldSerializer(many=True),
+        responses=SeatHoldSerializer(many=True),
+    )
+    def create(self, request, *args, **kwargs):
+        """Hold seats for SEAT_HOLD_SECONDS while the order is placed"""
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        Trip.objects.filter(id=instance.trip_id).bump_version()
+
 
-class OrderPagination(PageNumberPagination):
+class QueuedOrderViewSet(
+    ReplicaReadMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = QueuedOrder.objects.select_related("order").prefetch_related(
+        "order__tickets"
+    )
+    serializer_class = QueuedOrderSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user)
+
+
+class OrderPageNumberPagination(PageNumberPagination):
     page_size = 10
     max_page_size = 100
 
 
+class OrderPagination(KeysetPagination):
+    page_size = 10
+    ordering = ("-created_at", "-id")
+    page_number_class = OrderPageNumberPagination
+
+
 class OrderViewSet(
+    ReplicaReadMixin,
+    IdempotentCreateMixin,
+    QueuedCreateMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     viewsets.GenericViewSet,
@@ -228,7 +755,72 @@ class OrderViewSet(
         return OrderSerializer
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        queryset = Order.objects.filter(user=self.request.user)
+
+        if self.action == "list":
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "tickets__trip",
+                    queryset=Trip.objects.select_related(
+                        "route__source", "route__destination", "train"
+                    ).with_tickets_available()
+                )
+            )
+
+        return queryset
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                IDEMPOTENCY_HEADER,
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.HEADER,
+                description=(
+                    "Unique key of this order. Retries with the same key "
+                    "get the first response back instead of a new order."
+                ),
+            ),
+        ],
+        responses={201: OrderSerializer, 202: QueuedOrderSerializer},
+    )
+    def create(self, request, *args, **kwargs):
+        """Place an order, or queue it while QUEUE_ORDERS is on"""
+        return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "output",
+                type=OpenApiTypes.STR,
+                enum=tuple(EXPORT_FORMATS),
+                description="Export format (default csv)",
+            ),
+        ],
+        responses={(200, "text/csv"): OpenApiTypes.STR},
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=(IsAdminUser,),
+        pagination_class=None,
+    )
+    def export(self, request):
+        """Stream tickets of all users' orders for reconciliation"""
+        output = request.query_params.get("output", "csv")
+        if output not in EXPORT_FORMATS:
+            raise ValidationError(
+                {"output": f"Must be one of: {', '.join(EXPORT_FORMATS)}"}
+            )
+
+        content_type, render = EXPORT_FORMATS[output]
+        response = StreamingHttpResponse(
+            render(ticket_rows()), content_type=content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="orders.{output}"'
+        )
+
+        return response
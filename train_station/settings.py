@@ -27,7 +27,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv("SECRET_KEY", default="secret_key")
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = os.getenv("DEBUG")
+DEBUG = os.getenv("DEBUG", default="False") == "True"
 
 ALLOWED_HOSTS = os.getenv("DJANGO_ALLOWED_HOSTS").split(" ")
 
@@ -49,14 +49,12 @@ INSTALLED_APPS = [
     "drf_spectacular_sidecar",
     "rest_framework_simplejwt",
     "rest_framework",
-    "debug_toolbar",
     "station",
     "user",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -65,6 +63,12 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# The toolbar middleware is sync-only and would run async views in a
+# worker thread, so it is only installed for local debugging.
+if DEBUG:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(1, "debug_toolbar.middleware.DebugToolbarMiddleware")
+
 ROOT_URLCONF = "train_station.urls"
 
 TEMPLATES = [
@@ -97,9 +101,70 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", default="postgres"),
         "HOST": os.getenv("POSTGRES_HOST", default="localhost"),
         "PORT": os.getenv("POSTGRES_PORT", default="5432"),
+        "CONN_MAX_AGE": int(os.getenv("POSTGRES_CONN_MAX_AGE", default="60")),
+        "CONN_HEALTH_CHECKS": os.getenv(
+            "POSTGRES_CONN_HEALTH_CHECKS", default="True"
+        ) == "True",
     }
 }
 
+# Reads only go to the replica when POSTGRES_REPLICA_HOST is set. The
+# alias always exists so that tests can route to it as a mirror.
+DATABASES["replica"] = {
+    **DATABASES["default"],
+    "HOST": os.getenv(
+        "POSTGRES_REPLICA_HOST", default=DATABASES["default"]["HOST"]
+    ),
+    "PORT": os.getenv(
+        "POSTGRES_REPLICA_PORT", default=DATABASES["default"]["PORT"]
+    ),
+    "TEST": {"MIRROR": "default"},
+}
+DATABASE_REPLICAS = ["replica"] if os.getenv("POSTGRES_REPLICA_HOST") else []
+
+DATABASE_ROUTERS = ["station.replicas.ReplicaRouter"]
+
+# Throttle counters and cached responses stay in each process. Generation
+# tokens, replica pins and free-seat indexes go to the shared cache, which
+# must be Redis in production. Without REDIS_URL it falls back to the same
+# process-local memory as the default cache.
+REDIS_URL = os.getenv("REDIS_URL")
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+    } if REDIS_URL else {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+
+# Seconds a process trusts its copy of a generation token before asking
+# the shared cache again.
+GENERATION_LOCAL_SECONDS = int(
+    os.getenv("GENERATION_LOCAL_SECONDS", default="2")
+)
+
+# Seconds a user's reads stay on the primary after they write something.
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", default="10"))
+
+# Seconds a seat stays reserved for checkout after it is held.
+SEAT_HOLD_SECONDS = int(os.getenv("SEAT_HOLD_SECONDS", default="600"))
+
+# Seats one user may hold at the same time.
+MAX_ACTIVE_HOLDS = int(os.getenv("MAX_ACTIVE_HOLDS", default="10"))
+
+# Seconds the response to an Idempotency-Key is replayed to retries.
+IDEMPOTENCY_KEY_SECONDS = int(
+    os.getenv("IDEMPOTENCY_KEY_SECONDS", default="86400")
+)
+
+# Queue new orders for the process_order_queue worker instead of placing
+# them in the request. Meant for sale openings.
+QUEUE_ORDERS = os.getenv("QUEUE_ORDERS", default="False") == "True"
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -153,12 +218,17 @@ REST_FRAMEWORK = {
         "rest_framework.throttling.AnonRateThrottle",
         "rest_framework.throttling.UserRateThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "10/hour", "user": "30/hour"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": os.getenv("THROTTLE_ANON_RATE", default="10/hour"),
+        "user": os.getenv("THROTTLE_USER_RATE", default="30/hour"),
+    },
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ),
 }
 
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", default="30"))
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Train Station API",
     "DESCRIPTION": "Train station management with tickets ordering",
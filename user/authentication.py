@@ -0,0 +1,90 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+MAX_CACHED_USERS = 10000
+
+
+class UserCache:
+    """Process-local cache of authenticated users with a short TTL.
+
+    Saving or deleting a user drops its entry in the current process.
+    Other processes may keep it until the TTL expires, which is well
+    within the lifetime of the access token itself.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = OrderedDict()
+
+    def get(self, user_id):
+        entry = self._users.get(str(user_id))
+        if entry is None:
+            return None
+
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            self._users.pop(str(user_id), None)
+            return None
+
+        return copy.copy(user)
+
+    def set(self, user_id, user):
+        ttl = settings.AUTH_USER_CACHE_TTL
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._users[str(user_id)] = (time.monotonic() + ttl, user)
+            self._users.move_to_end(str(user_id))
+            while len(self._users) > MAX_CACHED_USERS:
+                self._users.popitem(last=False)
+
+    def _discard(self, user_id):
+        with self._lock:
+            self._users.pop(str(user_id), None)
+
+    def invalidate(self, user_id):
+        # Drop the entry again on commit, in case a concurrent request
+        # cached the row as it was before this transaction committed.
+        self._discard(user_id)
+        transaction.on_commit(lambda: self._discard(user_id))
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that skips the user lookup for users seen in
+    the last AUTH_USER_CACHE_TTL seconds."""
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = user_cache.get(user_id) if user_id is not None else None
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+            return copy.copy(user)
+
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."),
+                code="password_changed",
+            )
+
+        return user
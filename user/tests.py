@@ -1,3 +1,74 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from user.authentication import user_cache
+
+
+ME_URL = reverse("user:manage")
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@gmail.com",
+            password="password123",
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def test_user_lookup_is_cached(self):
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["email"], "user@gmail.com")
+
+    @override_settings(AUTH_USER_CACHE_TTL=0)
+    def test_cache_disabled(self):
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+
+    def test_update_invalidates_cached_user(self):
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {"email": "new@gmail.com"})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data["email"], "new@gmail.com")
+
+    def test_staff_change_invalidates_cached_user(self):
+        self.client.get(ME_URL)
+
+        self.user.is_staff = True
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertTrue(res.data["is_staff"])
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_is_rejected(self):
+        self.client.get(ME_URL)
+
+        self.user.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)